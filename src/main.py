@@ -1,5 +1,8 @@
 import os
+import asyncio
+import json
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 from dotenv import load_dotenv
 from fastapi import FastAPI
@@ -24,9 +27,40 @@ from .routers import (
 )
 from .config import get_settings, clear_settings_cache
 from .database import Base, engine, fix_sequences
+from .services.email_service import stop_email_batcher, close_email_http_client
+from .services.revalidation_service import (
+    bind_revalidation_loop,
+    close_revalidation_http_client,
+    flush_revalidations,
+)
+
+# Atributos estándar de LogRecord: todo lo demás vino por extra= y se agrega al JSON
+_STANDARD_LOG_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class _JsonFormatter(logging.Formatter):
+    """Formatea cada log como una línea JSON, incluyendo los campos pasados con extra="""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _STANDARD_LOG_ATTRS)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+
+# Configurar logging (LOG_FORMAT=json para logs estructurados, ej: en producción)
+if os.getenv("LOG_FORMAT", "").lower() == "json":
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(_JsonFormatter())
+    logging.basicConfig(level=logging.INFO, handlers=[_log_handler])
+else:
+    logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Cargar variables de entorno desde .env (solo en desarrollo local)
@@ -61,7 +95,20 @@ from .models.newsletter_subscriber import NewsletterSubscriber  # noqa: F401
 app_settings = get_settings()
 logger.info(f"🔧 CORS_ORIGIN configurado al iniciar: {app_settings.cors_origin}")
 
-app = FastAPI(title="GEPE Web Backend", version="0.1.0", redirect_slashes=False)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Los endpoints sync programan las revalidaciones del frontend en este loop
+    bind_revalidation_loop(asyncio.get_running_loop())
+    yield
+    # Enviar los emails que hayan quedado en cola antes de apagar
+    await stop_email_batcher()
+    await close_email_http_client()
+    await flush_revalidations()
+    await close_revalidation_http_client()
+
+
+app = FastAPI(title="GEPE Web Backend", version="0.1.0", redirect_slashes=False, lifespan=lifespan)
 
 # Configurar CORS
 # Construir lista de orígenes permitidos dinámicamente
@@ -1,5 +1,5 @@
+import re
 from typing import List, Optional
-import asyncio
 
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
 from sqlalchemy.orm import Session
@@ -7,39 +7,29 @@ from sqlalchemy.orm import Session
 from ..database import get_db
 from ..models.club import Club
 from ..schemas.club_schema import ClubCreate, ClubUpdate, ClubOut
-from ..services.revalidation_service import revalidate_club
+from ..services.revalidation_service import revalidate_club, schedule_revalidation
 
 router = APIRouter(prefix="/clubs", tags=["clubs"])
 
 
 def _trigger_club_revalidation(slug: str | None = None):
     """Helper para disparar revalidación de clubes en background."""
-    try:
-        asyncio.create_task(revalidate_club(slug))
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        loop.run_until_complete(revalidate_club(slug))
-        loop.close()
+    schedule_revalidation(revalidate_club(slug))
+
+
 
+_ACCENTS_TABLE = str.maketrans("áéíóúñ", "aeioun")
+_RE_NON_ALNUM = re.compile(r"[^a-z0-9]+")
 
 
 def _slugify(name: str) -> str:
     """
     Genera un slug sencillo a partir del nombre del club.
     """
-    import re
-
     slug = name.lower()
     # Eliminar tildes
-    slug = (
-        slug.replace("á", "a")
-        .replace("é", "e")
-        .replace("í", "i")
-        .replace("ó", "o")
-        .replace("ú", "u")
-        .replace("ñ", "n")
-    )
-    slug = re.sub(r"[^a-z0-9]+", "-", slug).strip("-")
+    slug = slug.translate(_ACCENTS_TABLE)
+    slug = _RE_NON_ALNUM.sub("-", slug).strip("-")
     return slug
 
 
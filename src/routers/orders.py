@@ -4,7 +4,7 @@ Router para gestionar órdenes de compra
 import logging
 import secrets
 import string
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, status, BackgroundTasks
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
 from typing import List, Dict, Optional
@@ -16,7 +16,7 @@ from ..models.order import Order, OrderItem, PRODUCTION_STATUS_WAITING_FABRIC, P
 from ..models.user import User
 from ..models.notification_email import NotificationEmail
 from ..schemas.order_schema import OrderCreate, OrderOut, OrderListOut, OrderUpdate, ProductionStatusUpdate
-from ..services.email_service import send_sale_notification_email
+from ..services.email_service import schedule_sale_notification_email
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["orders"])
@@ -59,6 +59,7 @@ def get_or_create_user(db: Session, email: str, full_name: str = None) -> User:
 @router.post("/orders", response_model=OrderOut, status_code=status.HTTP_201_CREATED)
 async def create_order(
     order_input: OrderCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
@@ -192,8 +193,8 @@ async def create_order(
                 ).all()
                 if admin_emails:
                     email_list = [e.email for e in admin_emails]
-                    await send_sale_notification_email(order, email_list)
-                    logger.info(f"Notificación de venta enviada a {len(email_list)} administradores")
+                    schedule_sale_notification_email(order.id, email_list, background_tasks)
+                    logger.info(f"Notificación de venta programada para {len(email_list)} administradores")
                 else:
                     logger.info("No hay emails de administradores verificados para enviar notificación")
             except Exception as e:
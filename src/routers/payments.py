@@ -413,7 +413,7 @@ async def mercadopago_webhook(
                     if not order.confirmation_email_sent:
                         try:
                             from sqlalchemy.orm import joinedload
-                            from ..services.email_service import send_order_confirmation_email, send_sale_notification_email
+                            from ..services.email_service import send_order_confirmation_email, schedule_sale_notification_email
                             from ..models.notification_email import NotificationEmail
                             
                             # Recargar la orden con los items para el email
@@ -436,8 +436,8 @@ async def mercadopago_webhook(
                                     ).all()
                                     if admin_emails:
                                         email_list = [e.email for e in admin_emails]
-                                        await send_sale_notification_email(order_with_items, email_list)
-                                        logger.info(f"✅ Notificación de venta enviada a {len(email_list)} administradores")
+                                        schedule_sale_notification_email(order.id, email_list)
+                                        logger.info(f"✅ Notificación de venta programada para {len(email_list)} administradores")
                                 except Exception as admin_email_error:
                                     logger.warning(f"⚠️ No se pudo enviar notificación a admins: {str(admin_email_error)}")
                         except Exception as email_error:
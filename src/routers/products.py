@@ -1,5 +1,4 @@
 from typing import List, Optional
-import asyncio
 
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, BackgroundTasks
 from sqlalchemy.orm import Session, joinedload
@@ -15,20 +14,14 @@ from ..schemas.product_price_settings_schema import (
     ProductPriceSettingsOut, ProductPriceSettingsUpdate
 )
 from ..utils import slugify
-from ..services.revalidation_service import revalidate_product, revalidate_prices
+from ..services.revalidation_service import revalidate_product, revalidate_prices, schedule_revalidation
 
 router = APIRouter(prefix="/products", tags=["products"])
 
 
 def _trigger_revalidation(slug: str | None = None):
     """Helper para disparar revalidación en background."""
-    try:
-        asyncio.create_task(revalidate_product(slug))
-    except RuntimeError:
-        # Si no hay event loop, crear uno temporalmente
-        loop = asyncio.new_event_loop()
-        loop.run_until_complete(revalidate_product(slug))
-        loop.close()
+    schedule_revalidation(revalidate_product(slug))
 
 
 
@@ -199,12 +192,7 @@ def update_price_settings(
     db.refresh(settings)
     
     # Revalidar cache del frontend (precios cambiaron)
-    try:
-        asyncio.create_task(revalidate_prices())
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        loop.run_until_complete(revalidate_prices())
-        loop.close()
+    schedule_revalidation(revalidate_prices())
     
     return settings
 
@@ -143,9 +143,7 @@ def get_email_config_status():
     """
     status = get_email_config_info()
     
-    if not status["resend_available"]:
-        status["error"] = "Resend no está instalado. Ejecuta: pip install resend"
-    elif not status["api_key_configured"]:
+    if not status["api_key_configured"]:
         status["error"] = "RESEND_API_KEY no está configurada en las variables de entorno. Agrega esta variable en tu archivo .env"
     
     return status
@@ -3,41 +3,589 @@ Servicio de Email usando Resend
 Documentación: https://resend.com/docs
 """
 import os
+import asyncio
+import collections
 import logging
+import functools
+import gzip
+import operator
+import importlib.util
+import random
+import string
+import time
+import uuid
+import weakref
+from types import SimpleNamespace
 from typing import Optional, List
+from urllib.parse import urlencode
+
+import httpx
+from fastapi import BackgroundTasks
+from markupsafe import escape
+
+from .email_templates import (
+    text_env,
+    format_price,
+    PRODUCTION_COMPLETE_TMPL,
+    ORDER_SHIPPED_TMPL,
+    SALE_NOTIFICATION_TMPL,
+    TEST_TMPL,
+    ORDER_CONFIRMATION_TMPL,
+)
 
 logger = logging.getLogger(__name__)
 
-# Intentar importar resend
-try:
-    import resend
-    RESEND_AVAILABLE = True
-except ImportError:
-    RESEND_AVAILABLE = False
-    logger.warning("Módulo 'resend' no instalado. Instalar con: pip install resend")
+
+_DEFAULT_FROM_EMAIL = "GEPE <notificaciones@gepesport.com>"
 
 
+# Las variables de entorno no cambian con el proceso en ejecución, así que se leen
+# una sola vez (en el primer uso, cuando main.py ya cargó el .env) y se cachean.
+@functools.lru_cache(maxsize=1)
 def _get_resend_api_key() -> Optional[str]:
     """Obtiene la API key de Resend desde las variables de entorno"""
     return os.getenv("RESEND_API_KEY")
 
 
+@functools.lru_cache(maxsize=1)
 def _get_default_reply_to() -> Optional[str]:
     """Reply-To por defecto para correos salientes"""
     return os.getenv("RESEND_REPLY_TO") or os.getenv("DEFAULT_NOTIFICATION_EMAIL")
 
 
+@functools.lru_cache(maxsize=1)
+def _get_from_email() -> str:
+    """Remitente de los correos salientes"""
+    return os.getenv("RESEND_FROM_EMAIL", _DEFAULT_FROM_EMAIL)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_frontend_url() -> str:
+    """URL pública del sitio, usada para los links de seguimiento"""
+    return os.getenv("FRONTEND_URL", "https://gepesport.com")
+
+
+@functools.lru_cache(maxsize=1)
+def _get_request_headers() -> dict:
+    """Headers de autenticación y contenido para la API de Resend"""
+    return {
+        "Authorization": f"Bearer {_get_resend_api_key()}",
+        "Content-Type": "application/json",
+    }
+
+
+# Límite por defecto documentado por Resend; las cuentas con otra cuota usan RESEND_RATE_LIMIT
+_DEFAULT_RESEND_RATE_LIMIT = 2
+
+
+@functools.lru_cache(maxsize=1)
+def _get_resend_rate_limit() -> int:
+    """Requests por segundo que permite la cuenta de Resend (RESEND_RATE_LIMIT)"""
+    value = os.getenv("RESEND_RATE_LIMIT")
+    if not value:
+        return _DEFAULT_RESEND_RATE_LIMIT
+    try:
+        return max(int(value), 1)
+    except ValueError:
+        logger.warning("RESEND_RATE_LIMIT inválido (%r), se usa %s", value, _DEFAULT_RESEND_RATE_LIMIT)
+        return _DEFAULT_RESEND_RATE_LIMIT
+
+
+@functools.lru_cache(maxsize=1)
+def _gzip_requests_enabled() -> bool:
+    """Si los cuerpos de los requests a Resend se mandan comprimidos (RESEND_GZIP_REQUESTS=true)"""
+    return os.getenv("RESEND_GZIP_REQUESTS", "false").lower() in ("1", "true", "yes")
+
+
+def reload_config() -> None:
+    """
+    Limpia la configuración cacheada para volver a leer las variables de entorno
+    (tests y scripts que las cambian en caliente)
+    """
+    _get_resend_api_key.cache_clear()
+    _get_default_reply_to.cache_clear()
+    _get_from_email.cache_clear()
+    _get_frontend_url.cache_clear()
+    _get_request_headers.cache_clear()
+    _gzip_requests_enabled.cache_clear()
+    _get_resend_rate_limit.cache_clear()
+    _get_resend_limiter.cache_clear()
+    _is_email_service_configured.cache_clear()
+
+
+@functools.lru_cache(maxsize=1)
 def _is_email_service_configured() -> bool:
-    """Verifica si el servicio de email está configurado correctamente"""
-    if not RESEND_AVAILABLE:
-        return False
-    api_key = _get_resend_api_key()
-    if not api_key:
+    """
+    Verifica si el servicio de email está configurado correctamente.
+    Los envíos van directo a la API HTTP de Resend (sin SDK): alcanza con tener la API key.
+    Se cachea junto con el resto de la configuración: la advertencia se loguea una sola vez.
+    """
+    if not _get_resend_api_key():
         logger.warning("RESEND_API_KEY no configurada en variables de entorno")
         return False
     return True
 
 
+def _size_text(size: Optional[str]) -> str:
+    """Sufijo con el talle del item para las listas de productos"""
+    return f" (Talle: {size})" if size else ""
+
+
+# Lee de una vez los campos de un item que usan las listas de productos
+_ITEM_EMAIL_FIELDS = ("product_name", "product_size", "quantity", "unit_price")
+_item_fields = operator.attrgetter(*_ITEM_EMAIL_FIELDS)
+
+
+# orjson serializa los cuerpos HTML grandes bastante más rápido que json; es opcional
+try:
+    import orjson
+
+    def _json_dumps(payload) -> bytes:
+        return orjson.dumps(payload)
+except ImportError:
+    import json
+
+    def _json_dumps(payload) -> bytes:
+        return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+# Cliente HTTP asíncrono compartido para la API de Resend: reutiliza conexiones
+# keep-alive y no bloquea el event loop durante el round trip.
+# Se crea en el primer envío (dentro del event loop) y se cierra al apagar la app.
+_RESEND_API_URL = "https://api.resend.com"
+# HTTP/2 solo si está instalado el paquete h2 (httpx[http2])
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+_http_client: Optional[httpx.AsyncClient] = None
+# El cliente y sus conexiones pertenecen al loop que los creó (igual que el lock):
+# si cambia el loop (scripts con asyncio.run, TestClient) se crean de nuevo
+_http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_http_client_lock: Optional[asyncio.Lock] = None
+
+
+async def _get_http_client() -> httpx.AsyncClient:
+    """Devuelve el cliente HTTP compartido del loop actual, creándolo la primera vez"""
+    global _http_client, _http_client_loop, _http_client_lock
+    loop = asyncio.get_running_loop()
+    if _http_client_loop is not loop:
+        _http_client = None
+        _http_client_loop = loop
+        _http_client_lock = asyncio.Lock()
+    if _http_client is None or _http_client.is_closed:
+        async with _http_client_lock:
+            if _http_client is None or _http_client.is_closed:
+                _http_client = httpx.AsyncClient(
+                    base_url=_RESEND_API_URL,
+                    timeout=10.0,
+                    http2=_HTTP2_AVAILABLE,
+                    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                )
+    return _http_client
+
+
+async def close_email_http_client() -> None:
+    """Cierra el cliente HTTP de Resend. Llamar al apagar la app"""
+    global _http_client
+    # Un cliente de otro loop ya no se puede cerrar desde acá: solo se descarta
+    if _http_client is not None and _http_client_loop is asyncio.get_running_loop():
+        await _http_client.aclose()
+    _http_client = None
+
+
+# Compresión opcional de los cuerpos: el HTML de los emails comprime muy bien.
+# Resend no documenta soporte de requests gzip, así que queda desactivada por defecto.
+_GZIP_MIN_BYTES = 1024
+
+
+class ResendAPIError(Exception):
+    """Error devuelto por la API de Resend"""
+
+    def __init__(self, code: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+        self.retry_after = retry_after
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Segundos de espera indicados por el header Retry-After (None si no vino o no es numérico)"""
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+async def _resend_post(path: str, payload, idempotency_key: Optional[str] = None) -> dict:
+    """
+    POST a la API de Resend usando el cliente HTTP compartido.
+    Con idempotency_key, Resend descarta los reenvíos de un request que ya aceptó.
+    """
+    body = _json_dumps(payload)
+    headers = _get_request_headers()
+    if idempotency_key:
+        headers = {**headers, "Idempotency-Key": idempotency_key}
+    if len(body) >= _GZIP_MIN_BYTES and _gzip_requests_enabled():
+        body = gzip.compress(body, compresslevel=1)
+        headers = {**headers, "Content-Encoding": "gzip"}
+    client = await _get_http_client()
+    response = await client.post(path, content=body, headers=headers)
+    if response.status_code >= 400:
+        try:
+            message = response.json().get("message", response.text)
+        except ValueError:
+            message = response.text
+        raise ResendAPIError(
+            response.status_code,
+            message,
+            retry_after=_parse_retry_after(response.headers.get("retry-after")),
+        )
+    return response.json()
+
+
+# Reintentos ante errores transitorios de Resend (rate limit, 5xx, fallas de red)
+_SEND_MAX_ATTEMPTS = 5
+_SEND_BACKOFF_BASE = 0.5  # segundos
+_SEND_BACKOFF_MAX = 30.0
+# Respuestas de Resend que indican un problema transitorio (rate limit, gateway, caída).
+# 409: el intento anterior con la misma clave de idempotencia todavía se está procesando
+_RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+# Circuit breaker: tras varias fallas transitorias seguidas se deja de intentar
+# (y de renderizar los emails) hasta que pase el tiempo de espera
+_CIRCUIT_FAIL_MAX = 5
+_CIRCUIT_RESET_TIMEOUT = 60.0  # segundos
+
+
+class _CircuitBreaker:
+    """Corta los envíos mientras Resend está caído para no acumular requests que van a fallar"""
+
+    def __init__(self, fail_max: int, reset_timeout: float):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+
+    def is_open(self) -> bool:
+        if self._opened_at is None:
+            return False
+        # Pasado el timeout se deja pasar el próximo envío como prueba (half-open)
+        return time.monotonic() - self._opened_at < self.reset_timeout
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info("Resend respondió de nuevo, se reanudan los envíos")
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self.fail_max:
+            if not self.is_open():
+                logger.warning(
+                    "Resend falló %s veces seguidas, se suspenden los envíos por %.0fs",
+                    self._failures, self.reset_timeout,
+                )
+            self._opened_at = time.monotonic()
+
+
+_resend_circuit = _CircuitBreaker(_CIRCUIT_FAIL_MAX, _CIRCUIT_RESET_TIMEOUT)
+
+
+def _resend_circuit_open(description: str) -> bool:
+    """Indica si hay que saltear un envío porque el circuito está abierto"""
+    if _resend_circuit.is_open():
+        logger.warning("Resend no disponible temporalmente, no se enviará %s", description)
+        return True
+    return False
+
+
+class _LoopSemaphore:
+    """
+    asyncio.Semaphore por event loop. Un Semaphore queda atado al primer loop que espera en él,
+    así que cada loop (app, scripts con asyncio.run, TestClient) usa el suyo.
+    """
+
+    def __init__(self, value: int):
+        self.value = value
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _get(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.value)
+        return semaphore
+
+    async def __aenter__(self) -> None:
+        await self._get().acquire()
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._get().release()
+
+
+# Máximo de requests simultáneos a Resend
+_RESEND_SEMAPHORE = _LoopSemaphore(10)
+
+
+class _RateLimiter:
+    """
+    Limitador asíncrono de ventana deslizante: como máximo `rate` requests en cualquier
+    intervalo de `period` segundos. Las ráfagas (ej: cambio de estado masivo de pedidos)
+    se reparten en el tiempo en lugar de chocar contra el 429 de Resend.
+    """
+
+    def __init__(self, rate: int, period: float = 1.0):
+        self.rate = rate
+        self.period = period
+        # Momentos de los últimos `rate` requests
+        self._sent_at = collections.deque(maxlen=rate)
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def __aenter__(self) -> None:
+        # El lock queda atado a un loop: si cambia (scripts con asyncio.run) se crea otro
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        # El lock atiende a los que esperan en orden de llegada
+        async with self._lock:
+            if len(self._sent_at) == self.rate:
+                wait = self._sent_at[0] + self.period - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            self._sent_at.append(time.monotonic())
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def _get_resend_limiter() -> _RateLimiter:
+    """Limitador compartido de requests a Resend, creado con la cuota configurada"""
+    return _RateLimiter(_get_resend_rate_limit())
+
+
+def _is_retryable_error(error: Exception) -> bool:
+    """Indica si un error de envío es transitorio y vale la pena reintentar"""
+    if isinstance(error, httpx.TransportError):
+        # Incluye los errores posteriores al envío del request (ReadTimeout, conexión cortada):
+        # reintentarlos es seguro porque todos los intentos llevan la misma Idempotency-Key
+        return True
+    try:
+        status_code = int(getattr(error, "code", None))
+    except (TypeError, ValueError):
+        return False
+    return status_code in _RETRYABLE_STATUS_CODES
+
+
+def _retry_delay(attempt: int, error: Exception) -> float:
+    """
+    Espera antes del próximo intento: backoff exponencial con jitter, o lo que pida Resend si es mayor.
+    El jitter evita que varios envíos que fallaron juntos reintenten todos en el mismo instante.
+    """
+    backoff = min(_SEND_BACKOFF_BASE * 2 ** (attempt - 1), _SEND_BACKOFF_MAX)
+    delay = random.uniform(backoff / 2, backoff)
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return min(delay, _SEND_BACKOFF_MAX)
+
+
+async def _send_with_retry(path: str, payload):
+    """
+    Llama a Resend reintentando con backoff exponencial los errores transitorios.
+    Todos los intentos llevan la misma clave de idempotencia: un timeout de lectura o una
+    conexión cortada pueden llegar después de que Resend aceptó el envío, y sin la clave
+    el reintento mandaría el mismo email (o el batch completo) dos veces.
+    """
+    idempotency_key = str(uuid.uuid4())
+    for attempt in range(1, _SEND_MAX_ATTEMPTS + 1):
+        try:
+            async with _get_resend_limiter(), _RESEND_SEMAPHORE:
+                response = await _resend_post(path, payload, idempotency_key)
+            _resend_circuit.record_success()
+            return response
+        except Exception as e:
+            if not _is_retryable_error(e):
+                raise
+            if attempt == _SEND_MAX_ATTEMPTS:
+                _resend_circuit.record_failure()
+                raise
+            delay = _retry_delay(attempt, e)
+            logger.warning(
+                "Error transitorio de Resend (intento %s/%s): %s. Reintentando en %.1fs",
+                attempt, _SEND_MAX_ATTEMPTS, e, delay,
+            )
+            await asyncio.sleep(delay)
+
+
+# --- Agrupación de envíos ---
+# Los emails que llegan dentro de una misma ventana corta se mandan juntos
+# en un único request a /emails/batch en lugar de uno por mensaje.
+_BATCH_MAX_SIZE = 100  # máximo de mensajes por request batch que acepta Resend
+_BATCH_WINDOW = 0.05  # segundos que se espera a que se sumen más mensajes
+
+_email_queue: Optional[asyncio.Queue] = None
+_batch_worker: Optional[asyncio.Task] = None
+# Referencias a los flush en curso para que el GC no los descarte
+_batch_flushes: set = set()
+
+
+async def _post_messages(messages: List[dict]) -> List[str]:
+    """Envía los mensajes en un solo request y devuelve los IDs en el mismo orden"""
+    if len(messages) == 1:
+        response = await _send_with_retry("/emails", messages[0])
+        return [response.get("id", "N/A")]
+    response = await _send_with_retry("/emails/batch", messages)
+    ids = [str(item.get("id")) for item in response.get("data", [])]
+    return ids + ["N/A"] * (len(messages) - len(ids))
+
+
+async def _flush_batch(batch: list) -> None:
+    """Envía un lote de la cola y resuelve el future de cada mensaje"""
+    messages = [params for params, _ in batch]
+    try:
+        ids = await _post_messages(messages)
+    except Exception as e:
+        if len(batch) == 1 or _is_retryable_error(e):
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        # Resend rechaza el batch completo si un mensaje es inválido:
+        # se reintenta uno por uno para no perder los demás
+        logger.warning("Batch de %s emails rechazado (%s). Enviando individualmente", len(batch), e)
+        await asyncio.gather(*(_flush_batch([entry]) for entry in batch))
+        return
+    for (_, future), email_id in zip(batch, ids):
+        if not future.done():
+            future.set_result(email_id)
+
+
+def _start_flush(batch: list) -> None:
+    task = asyncio.create_task(_flush_batch(batch))
+    _batch_flushes.add(task)
+    task.add_done_callback(_batch_flushes.discard)
+
+
+async def _run_batch_worker(queue: asyncio.Queue) -> None:
+    """Junta los mensajes de la cola hasta llenar el lote o vencer la ventana y los envía"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        try:
+            deadline = loop.time() + _BATCH_WINDOW
+            while len(batch) < _BATCH_MAX_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+        finally:
+            # El flush corre aparte para que el worker siga juntando mientras tanto
+            _start_flush(batch)
+
+
+def _enqueue_email(params: dict) -> asyncio.Future:
+    """Encola un mensaje para el próximo batch. El future se resuelve con el ID del email"""
+    global _email_queue, _batch_worker
+    loop = asyncio.get_running_loop()
+    if _batch_worker is None or _batch_worker.done() or _batch_worker.get_loop() is not loop:
+        _email_queue = asyncio.Queue()
+        _batch_worker = loop.create_task(_run_batch_worker(_email_queue))
+    future = loop.create_future()
+    _email_queue.put_nowait((params, future))
+    return future
+
+
+async def stop_email_batcher() -> None:
+    """Detiene el worker de batch enviando lo que quede pendiente. Llamar al apagar la app"""
+    global _batch_worker
+    # Primero terminar los envíos programados en segundo plano (ej: notificación de venta
+    # del webhook): pueden estar leyendo la orden y todavía no haber encolado su email
+    if _pending_email_tasks:
+        await asyncio.gather(*_pending_email_tasks, return_exceptions=True)
+    if _batch_worker is not None:
+        _batch_worker.cancel()
+        try:
+            await _batch_worker
+        except asyncio.CancelledError:
+            pass
+        _batch_worker = None
+        pending = []
+        while not _email_queue.empty():
+            pending.append(_email_queue.get_nowait())
+        for start in range(0, len(pending), _BATCH_MAX_SIZE):
+            _start_flush(pending[start:start + _BATCH_MAX_SIZE])
+    if _batch_flushes:
+        await asyncio.gather(*_batch_flushes, return_exceptions=True)
+
+
+async def _send_email(
+    *,
+    to: List[str],
+    subject: str,
+    html: str,
+    text: Optional[str] = None,
+    reply_to: Optional[str] = None,
+    description: str = "email",
+    separate_recipients: bool = False,
+) -> bool:
+    """
+    Envía un email por Resend. Centraliza el armado de params, el envío y el logueo.
+    Los mensajes se encolan y salen agrupados con los de otros envíos concurrentes.
+    
+    Args:
+        to: Lista de destinatarios
+        subject: Asunto del email
+        html: Cuerpo HTML
+        text: Versión plain text (opcional)
+        reply_to: Dirección de Reply-To (opcional)
+        description: Descripción del email para los logs (ej: "email de envío")
+        separate_recipients: Si es True, cada destinatario recibe su propia copia
+            (nadie ve las direcciones de los demás)
+        
+    Returns:
+        bool: True si el email se envió correctamente, False en caso contrario
+    """
+    params = {
+        "from": _get_from_email(),
+        "to": to,
+        "subject": subject,
+        "html": html,
+    }
+    if text:
+        params["text"] = text
+    if reply_to:
+        params["reply_to"] = [reply_to]
+    
+    if _resend_circuit_open(description):
+        return False
+    
+    if separate_recipients and len(to) > 1:
+        # Copias superficiales: el HTML se comparte por referencia entre los mensajes
+        messages = [{**params, "to": [address]} for address in to]
+    else:
+        messages = [params]
+    
+    try:
+        email_ids = await asyncio.gather(*(_enqueue_email(message) for message in messages))
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Envío de %s exitoso a %s. ID: %s", description, ", ".join(to), ", ".join(email_ids),
+                extra={"email_description": description, "email_to": to, "resend_ids": email_ids},
+            )
+        return True
+    except Exception as e:
+        logger.error(
+            "Error al enviar %s: %s", description, e,
+            exc_info=logger.isEnabledFor(logging.DEBUG),
+            extra={"email_description": description, "email_to": to},
+        )
+        return False
+
+
 def is_email_service_configured() -> bool:
     """Función pública para verificar si el servicio de email está configurado"""
     return _is_email_service_configured()
@@ -46,13 +594,32 @@ def is_email_service_configured() -> bool:
 def get_email_config_info() -> dict:
     """Obtiene información sobre la configuración del servicio de email"""
     return {
-        "resend_available": RESEND_AVAILABLE,
         "api_key_configured": bool(_get_resend_api_key()),
-        "from_email": os.getenv("RESEND_FROM_EMAIL", "GEPE <notificaciones@gepesport.com>"),
+        "from_email": _get_from_email(),
         "configured": _is_email_service_configured()
     }
 
 
+# Versión texto del email de pedido listo (el HTML está en templates/email/production_complete.html)
+_PRODUCTION_COMPLETE_ROW_TEXT = "  - {name}{size} x{quantity}\n"
+_PRODUCTION_COMPLETE_TEXT = string.Template("""
+Tu pedido está listo
+
+Hola $customer_name,
+
+¡Excelentes noticias! Tu pedido $order_number ya está terminado y listo para ser enviado.
+
+Productos en tu pedido:
+$products_text
+Te enviaremos otro correo con la información de seguimiento cuando tu pedido sea despachado.
+
+¿Tenés alguna pregunta? Respondé a este correo o contactanos por WhatsApp.
+
+---
+GEPE Sport - Indumentaria deportiva
+""")
+
+
 async def send_production_complete_email(order) -> bool:
     """
     Envía un email al cliente notificando que su pedido está listo.
@@ -67,119 +634,34 @@ async def send_production_complete_email(order) -> bool:
         logger.warning("Servicio de email no configurado, no se enviará notificación")
         return False
     
-    if not order.customer_email:
-        logger.warning(f"Orden {order.id} no tiene email de cliente")
+    if _resend_circuit_open("notificación"):
         return False
     
-    try:
-        resend.api_key = _get_resend_api_key()
-        
-        # Preparar lista de productos
-        products_html = ""
-        for item in order.items:
-            size_text = f" (Talle: {item.product_size})" if item.product_size else ""
-            products_html += f"""
-            <tr>
-                <td style="padding: 8px; border-bottom: 1px solid #eee;">{item.product_name}{size_text}</td>
-                <td style="padding: 8px; border-bottom: 1px solid #eee; text-align: center;">{item.quantity}</td>
-            </tr>
-            """
-        
-        # HTML del email
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        </head>
-        <body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
-            <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 30px; border-radius: 12px 12px 0 0; text-align: center;">
-                <h1 style="color: white; margin: 0; font-size: 24px;">¡Tu pedido está listo! 🎉</h1>
-            </div>
-            
-            <div style="background: #ffffff; padding: 30px; border: 1px solid #e5e7eb; border-top: none; border-radius: 0 0 12px 12px;">
-                <p style="font-size: 16px;">Hola <strong>{order.customer_name or 'Cliente'}</strong>,</p>
-                
-                <p>¡Excelentes noticias! Tu pedido <strong style="color: #667eea;">{order.order_number}</strong> ya está terminado y listo para ser enviado.</p>
-                
-                <div style="background: #f9fafb; border-radius: 8px; padding: 20px; margin: 20px 0;">
-                    <h3 style="margin-top: 0; color: #374151;">Productos en tu pedido:</h3>
-                    <table style="width: 100%; border-collapse: collapse;">
-                        <thead>
-                            <tr style="background: #e5e7eb;">
-                                <th style="padding: 10px; text-align: left;">Producto</th>
-                                <th style="padding: 10px; text-align: center;">Cantidad</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-                            {products_html}
-                        </tbody>
-                    </table>
-                </div>
-                
-                <p style="font-size: 14px; color: #6b7280;">
-                    Te enviaremos otro correo con la información de seguimiento cuando tu pedido sea despachado.
-                </p>
-                
-                <hr style="border: none; border-top: 1px solid #e5e7eb; margin: 20px 0;">
-                
-                <p style="font-size: 12px; color: #9ca3af; text-align: center;">
-                    ¿Tenés alguna pregunta? Respondé a este correo o contactanos por WhatsApp.
-                </p>
-            </div>
-            
-            <p style="text-align: center; font-size: 12px; color: #9ca3af; margin-top: 20px;">
-                © 2025 GEPE Sport - Indumentaria deportiva
-            </p>
-        </body>
-        </html>
-        """
-        
-        # Versión plain text para mejor deliverability
-        products_text = ""
-        for item in order.items:
-            size_text = f" (Talle: {item.product_size})" if item.product_size else ""
-            products_text += f"  - {item.product_name}{size_text} x{item.quantity}\n"
-        
-        text_content = f"""
-Tu pedido está listo
-
-Hola {order.customer_name or 'Cliente'},
-
-¡Excelentes noticias! Tu pedido {order.order_number} ya está terminado y listo para ser enviado.
-
-Productos en tu pedido:
-{products_text}
-Te enviaremos otro correo con la información de seguimiento cuando tu pedido sea despachado.
-
-¿Tenés alguna pregunta? Respondé a este correo o contactanos por WhatsApp.
-
----
-GEPE Sport - Indumentaria deportiva
-        """
-        
-        # Enviar email
-        params = {
-            "from": os.getenv("RESEND_FROM_EMAIL", "GEPE <notificaciones@gepesport.com>"),
-            "to": [order.customer_email],
-            "subject": f"Tu pedido {order.order_number} esta listo!",
-            "html": html_content,
-            "text": text_content,
-        }
-
-        reply_to = _get_default_reply_to()
-        if reply_to:
-            params["reply_to"] = [reply_to]
-        
-        response = resend.Emails.send(params)
-        
-        logger.info(f"Email enviado exitosamente a {order.customer_email}. ID: {response.get('id', 'N/A')}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Error al enviar email: {str(e)}", exc_info=True)
+    if not order.customer_email:
+        logger.warning("Orden %s no tiene email de cliente", order.id)
         return False
+    
+    html_content = PRODUCTION_COMPLETE_TMPL.render(order=order)
+    
+    # Versión plain text para mejor deliverability
+    products_text = "".join(
+        _PRODUCTION_COMPLETE_ROW_TEXT.format(name=name, size=_size_text(size), quantity=quantity)
+        for name, size, quantity, _ in map(_item_fields, order.items)
+    )
+    text_content = _PRODUCTION_COMPLETE_TEXT.safe_substitute(
+        customer_name=order.customer_name or "Cliente",
+        order_number=order.order_number,
+        products_text=products_text,
+    )
+
+    return await _send_email(
+        to=[order.customer_email],
+        subject=f"Tu pedido {order.order_number} esta listo!",
+        html=html_content,
+        text=text_content,
+        reply_to=_get_default_reply_to(),
+        description="email",
+    )
 
 
 async def send_order_shipped_email(order, tracking_code: str = None) -> bool:
@@ -197,93 +679,30 @@ async def send_order_shipped_email(order, tracking_code: str = None) -> bool:
         logger.warning("Servicio de email no configurado, no se enviará notificación")
         return False
     
+    if _resend_circuit_open("notificación"):
+        return False
+    
     if not order.customer_email:
-        logger.warning(f"Orden {order.id} no tiene email de cliente")
+        logger.warning("Orden %s no tiene email de cliente", order.id)
         return False
     
-    try:
-        resend.api_key = _get_resend_api_key()
-        
-        tracking_section = ""
-        if tracking_code:
-            # Obtener empresa y sucursal del objeto order
-            tracking_company = getattr(order, 'tracking_company', None) or ""
-            tracking_branch = getattr(order, 'tracking_branch_address', None) or ""
-            
-            company_html = f"""
-                <p style="margin: 5px 0; color: #065f46;">
-                    <strong>Empresa:</strong> {tracking_company}
-                </p>
-            """ if tracking_company else ""
-            
-            branch_html = f"""
-                <p style="margin: 5px 0; color: #065f46; font-size: 14px;">
-                    <strong>Sucursal:</strong> {tracking_branch}
-                </p>
-            """ if tracking_branch else ""
-            
-            tracking_section = f"""
-            <div style="background: #ecfdf5; border: 1px solid #10b981; border-radius: 8px; padding: 15px; margin: 20px 0; text-align: center;">
-                <p style="margin: 0 0 10px 0; color: #065f46;">
-                    <strong>Código de seguimiento:</strong><br>
-                    <span style="font-size: 18px; font-weight: bold; color: #10b981;">{tracking_code}</span>
-                </p>
-                {company_html}
-                {branch_html}
-            </div>
-            """
-        
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        </head>
-        <body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
-            <div style="background: linear-gradient(135deg, #10b981 0%, #059669 100%); padding: 30px; border-radius: 12px 12px 0 0; text-align: center;">
-                <h1 style="color: white; margin: 0; font-size: 24px;">¡Tu pedido está en camino! 📦</h1>
-            </div>
-            
-            <div style="background: #ffffff; padding: 30px; border: 1px solid #e5e7eb; border-top: none; border-radius: 0 0 12px 12px;">
-                <p style="font-size: 16px;">Hola <strong>{order.customer_name or 'Cliente'}</strong>,</p>
-                
-                <p>Tu pedido <strong style="color: #10b981;">{order.order_number}</strong> ya fue despachado y está en camino.</p>
-                
-                {tracking_section}
-                
-                <p style="font-size: 14px; color: #6b7280;">
-                    Podés seguir el estado de tu envío con el código de seguimiento.
-                </p>
-                
-                <hr style="border: none; border-top: 1px solid #e5e7eb; margin: 20px 0;">
-                
-                <p style="font-size: 12px; color: #9ca3af; text-align: center;">
-                    ¿Tenés alguna pregunta? Respondé a este correo o contactanos por WhatsApp.
-                </p>
-            </div>
-            
-            <p style="text-align: center; font-size: 12px; color: #9ca3af; margin-top: 20px;">
-                © 2025 GEPE Sport - Indumentaria deportiva
-            </p>
-        </body>
-        </html>
-        """
-        
-        # Versión plain text
-        tracking_company = getattr(order, 'tracking_company', None) or ""
-        tracking_branch = getattr(order, 'tracking_branch_address', None) or ""
-        
-        tracking_text = ""
-        if tracking_code:
-            tracking_text = f"\nCódigo de seguimiento: {tracking_code}"
-            if tracking_company:
-                tracking_text += f"\nEmpresa: {tracking_company}"
-            if tracking_branch:
-                tracking_text += f"\nSucursal: {tracking_branch}"
-            tracking_text += "\n"
-        
-        text_content = f"""
+    html_content = ORDER_SHIPPED_TMPL.render(order=order, tracking_code=tracking_code)
+    
+    # Versión plain text
+    tracking_company = getattr(order, 'tracking_company', None) or ""
+    tracking_branch = getattr(order, 'tracking_branch_address', None) or ""
+    
+    tracking_text = ""
+    if tracking_code:
+        tracking_lines = [f"\nCódigo de seguimiento: {tracking_code}"]
+        if tracking_company:
+            tracking_lines.append(f"\nEmpresa: {tracking_company}")
+        if tracking_branch:
+            tracking_lines.append(f"\nSucursal: {tracking_branch}")
+        tracking_lines.append("\n")
+        tracking_text = "".join(tracking_lines)
+    
+    text_content = f"""
 Tu pedido esta en camino
 
 Hola {order.customer_name or 'Cliente'},
@@ -296,28 +715,36 @@ Podés seguir el estado de tu envío con el código de seguimiento.
 
 ---
 GEPE Sport - Indumentaria deportiva
-        """
-        
-        params = {
-            "from": os.getenv("RESEND_FROM_EMAIL", "GEPE <notificaciones@gepesport.com>"),
-            "to": [order.customer_email],
-            "subject": f"Tu pedido {order.order_number} esta en camino",
-            "html": html_content,
-            "text": text_content,
-        }
-
-        reply_to = _get_default_reply_to()
-        if reply_to:
-            params["reply_to"] = [reply_to]
-        
-        response = resend.Emails.send(params)
-        
-        logger.info(f"Email de envío enviado a {order.customer_email}. ID: {response.get('id', 'N/A')}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Error al enviar email de envío: {str(e)}", exc_info=True)
-        return False
+    """
+
+    return await _send_email(
+        to=[order.customer_email],
+        subject=f"Tu pedido {order.order_number} esta en camino",
+        html=html_content,
+        text=text_content,
+        reply_to=_get_default_reply_to(),
+        description="email de envío",
+    )
+
+
+# El email de prueba no tiene datos variables: se renderiza una sola vez al importar
+_TEST_EMAIL_HTML = TEST_TMPL.render()
+
+# Versión plain text para mejor deliverability
+_TEST_EMAIL_TEXT = """
+Correo de prueba recibido
+
+Perfecto!
+
+Este es un correo de prueba para verificar que tu dirección de correo electrónico está configurada correctamente para recibir notificaciones del sistema de GEPE.
+
+Verificación exitosa: A partir de ahora, recibirás notificaciones sobre eventos importantes como nuevas ventas, pagos recibidos y stock bajo.
+
+No necesitas realizar ninguna acción. Este correo solo confirma que las notificaciones están funcionando correctamente.
+
+---
+Sistema de Notificaciones GEPE
+    """
 
 
 async def send_test_email(email: str) -> bool:
@@ -335,87 +762,20 @@ async def send_test_email(email: str) -> bool:
         logger.warning("Servicio de email no configurado, no se enviará email de prueba")
         return False
     
+    if _resend_circuit_open("email de prueba"):
+        return False
+    
     if not email or not email.strip():
         logger.warning("Email vacío, no se enviará email de prueba")
         return False
     
-    try:
-        resend.api_key = _get_resend_api_key()
-        
-        html_content = """
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        </head>
-        <body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
-            <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 30px; border-radius: 12px 12px 0 0; text-align: center;">
-                <h1 style="color: white; margin: 0; font-size: 24px;">✅ Correo de prueba recibido</h1>
-            </div>
-            
-            <div style="background: #ffffff; padding: 30px; border: 1px solid #e5e7eb; border-top: none; border-radius: 0 0 12px 12px;">
-                <p style="font-size: 16px;">¡Perfecto!</p>
-                
-                <p>Este es un correo de prueba para verificar que tu dirección de correo electrónico está configurada correctamente para recibir notificaciones del sistema de GEPE.</p>
-                
-                <div style="background: #ecfdf5; border: 1px solid #10b981; border-radius: 8px; padding: 15px; margin: 20px 0;">
-                    <p style="margin: 0; color: #065f46;">
-                        <strong>✅ Verificación exitosa</strong><br>
-                        <span style="font-size: 14px;">A partir de ahora, recibirás notificaciones sobre eventos importantes como nuevas ventas, pagos recibidos y stock bajo.</span>
-                    </p>
-                </div>
-                
-                <p style="font-size: 14px; color: #6b7280;">
-                    No necesitas realizar ninguna acción. Este correo solo confirma que las notificaciones están funcionando correctamente.
-                </p>
-                
-                <hr style="border: none; border-top: 1px solid #e5e7eb; margin: 20px 0;">
-                
-                <p style="font-size: 12px; color: #9ca3af; text-align: center;">
-                    Sistema de Notificaciones GEPE
-                </p>
-            </div>
-            
-            <p style="text-align: center; font-size: 12px; color: #9ca3af; margin-top: 20px;">
-                © 2025 GEPE Sport - Indumentaria deportiva
-            </p>
-        </body>
-        </html>
-        """
-        
-        # Versión plain text para mejor deliverability
-        text_content = """
-Correo de prueba recibido
-
-Perfecto!
-
-Este es un correo de prueba para verificar que tu dirección de correo electrónico está configurada correctamente para recibir notificaciones del sistema de GEPE.
-
-Verificación exitosa: A partir de ahora, recibirás notificaciones sobre eventos importantes como nuevas ventas, pagos recibidos y stock bajo.
-
-No necesitas realizar ninguna acción. Este correo solo confirma que las notificaciones están funcionando correctamente.
-
----
-Sistema de Notificaciones GEPE
-        """
-        
-        params = {
-            "from": os.getenv("RESEND_FROM_EMAIL", "GEPE <notificaciones@gepesport.com>"),
-            "to": [email.strip()],
-            "subject": "Correo de prueba - Notificaciones GEPE",
-            "html": html_content,
-            "text": text_content,
-        }
-        
-        response = resend.Emails.send(params)
-        
-        logger.info(f"Email de prueba enviado exitosamente a {email}. ID: {response.get('id', 'N/A')}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Error al enviar email de prueba: {str(e)}", exc_info=True)
-        return False
+    return await _send_email(
+        to=[email.strip()],
+        subject="Correo de prueba - Notificaciones GEPE",
+        html=_TEST_EMAIL_HTML,
+        text=_TEST_EMAIL_TEXT,
+        description="email de prueba",
+    )
 
 
 async def send_regret_notification_email(form_data: dict, admin_emails: List[str]) -> bool:
@@ -425,61 +785,73 @@ async def send_regret_notification_email(form_data: dict, admin_emails: List[str
     if not _is_email_service_configured():
         logger.warning("Servicio de email no configurado, no se enviará notificación de arrepentimiento")
         return False
+    
+    if _resend_circuit_open("notificación de arrepentimiento"):
+        return False
 
     if not admin_emails:
         logger.warning("No hay emails de administradores configurados para recibir notificaciones")
         return False
 
-    try:
-        resend.api_key = _get_resend_api_key()
-
-        cliente_nombre = f"{form_data.get('nombre','').strip()} {form_data.get('apellido','').strip()}".strip()
-        numero_pedido = form_data.get("numeroPedido") or "No especificado"
-        articulos = form_data.get("articulosComprados") or "No especificado"
-        telefono = form_data.get("telefono") or "No especificado"
-        correo = form_data.get("correo") or "No especificado"
-        dni = form_data.get("dni") or "No especificado"
-        ciudad = form_data.get("ciudad") or "No especificada"
-        motivo = form_data.get("motivo") or "No especificado"
-
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        </head>
-        <body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; line-height: 1.6; color: #1f2937; max-width: 640px; margin: 0 auto; padding: 24px; background: #f9fafb;">
-            <div style="background: #111827; color: white; padding: 20px; border-radius: 12px 12px 0 0; text-align: center;">
-                <h1 style="margin: 0; font-size: 22px;">🛑 Arrepentimiento de compra</h1>
-            </div>
-            <div style="background: white; padding: 24px; border: 1px solid #e5e7eb; border-top: none; border-radius: 0 0 12px 12px;">
-                <p style="margin: 0 0 12px 0;">Se recibió una solicitud de arrepentimiento de compra.</p>
-                <h3 style="margin: 16px 0 8px 0; color: #111827;">Datos del cliente</h3>
-                <table style="width: 100%; border-collapse: collapse;">
-                    <tr><td style="padding: 6px 0; color: #6b7280;">Nombre</td><td style="padding: 6px 0; font-weight: 600;">{cliente_nombre or 'No especificado'}</td></tr>
-                    <tr><td style="padding: 6px 0; color: #6b7280;">DNI</td><td style="padding: 6px 0; font-weight: 600;">{dni}</td></tr>
-                    <tr><td style="padding: 6px 0; color: #6b7280;">Ciudad</td><td style="padding: 6px 0; font-weight: 600;">{ciudad}</td></tr>
-                    <tr><td style="padding: 6px 0; color: #6b7280;">Teléfono</td><td style="padding: 6px 0; font-weight: 600;">{telefono}</td></tr>
-                    <tr><td style="padding: 6px 0; color: #6b7280;">Correo</td><td style="padding: 6px 0; font-weight: 600;">{correo}</td></tr>
-                </table>
-
-                <h3 style="margin: 16px 0 8px 0; color: #111827;">Detalle de la compra</h3>
-                <table style="width: 100%; border-collapse: collapse;">
-                    <tr><td style="padding: 6px 0; color: #6b7280;">N° Pedido</td><td style="padding: 6px 0; font-weight: 600;">{numero_pedido}</td></tr>
-                    <tr><td style="padding: 6px 0; color: #6b7280;">Artículos</td><td style="padding: 6px 0; font-weight: 600;">{articulos}</td></tr>
-                </table>
-
-                <h3 style="margin: 16px 0 8px 0; color: #111827;">Motivo</h3>
-                <div style="padding: 12px; background: #f3f4f6; border-radius: 8px; color: #374151;">{motivo}</div>
-            </div>
-            <p style="text-align: center; color: #9ca3af; font-size: 12px; margin-top: 12px;">GEPE Notificaciones</p>
-        </body>
-        </html>
-        """
-        
-        # Versión plain text para mejor deliverability
-        text_content = f"""
+    cliente_nombre = f"{form_data.get('nombre','').strip()} {form_data.get('apellido','').strip()}".strip()
+    numero_pedido = form_data.get("numeroPedido") or "No especificado"
+    articulos = form_data.get("articulosComprados") or "No especificado"
+    telefono = form_data.get("telefono") or "No especificado"
+    correo = form_data.get("correo") or "No especificado"
+    dni = form_data.get("dni") or "No especificado"
+    ciudad = form_data.get("ciudad") or "No especificada"
+    motivo = form_data.get("motivo") or "No especificado"
+
+    # Valores dinámicos escapados para el HTML
+    ctx = {
+        "cliente_nombre": escape(cliente_nombre or "No especificado"),
+        "numero_pedido": escape(numero_pedido),
+        "articulos": escape(articulos),
+        "telefono": escape(telefono),
+        "correo": escape(correo),
+        "dni": escape(dni),
+        "ciudad": escape(ciudad),
+        "motivo": escape(motivo),
+    }
+
+    html_content = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    </head>
+    <body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; line-height: 1.6; color: #1f2937; max-width: 640px; margin: 0 auto; padding: 24px; background: #f9fafb;">
+        <div style="background: #111827; color: white; padding: 20px; border-radius: 12px 12px 0 0; text-align: center;">
+            <h1 style="margin: 0; font-size: 22px;">🛑 Arrepentimiento de compra</h1>
+        </div>
+        <div style="background: white; padding: 24px; border: 1px solid #e5e7eb; border-top: none; border-radius: 0 0 12px 12px;">
+            <p style="margin: 0 0 12px 0;">Se recibió una solicitud de arrepentimiento de compra.</p>
+            <h3 style="margin: 16px 0 8px 0; color: #111827;">Datos del cliente</h3>
+            <table style="width: 100%; border-collapse: collapse;">
+                <tr><td style="padding: 6px 0; color: #6b7280;">Nombre</td><td style="padding: 6px 0; font-weight: 600;">{ctx['cliente_nombre']}</td></tr>
+                <tr><td style="padding: 6px 0; color: #6b7280;">DNI</td><td style="padding: 6px 0; font-weight: 600;">{ctx['dni']}</td></tr>
+                <tr><td style="padding: 6px 0; color: #6b7280;">Ciudad</td><td style="padding: 6px 0; font-weight: 600;">{ctx['ciudad']}</td></tr>
+                <tr><td style="padding: 6px 0; color: #6b7280;">Teléfono</td><td style="padding: 6px 0; font-weight: 600;">{ctx['telefono']}</td></tr>
+                <tr><td style="padding: 6px 0; color: #6b7280;">Correo</td><td style="padding: 6px 0; font-weight: 600;">{ctx['correo']}</td></tr>
+            </table>
+
+            <h3 style="margin: 16px 0 8px 0; color: #111827;">Detalle de la compra</h3>
+            <table style="width: 100%; border-collapse: collapse;">
+                <tr><td style="padding: 6px 0; color: #6b7280;">N° Pedido</td><td style="padding: 6px 0; font-weight: 600;">{ctx['numero_pedido']}</td></tr>
+                <tr><td style="padding: 6px 0; color: #6b7280;">Artículos</td><td style="padding: 6px 0; font-weight: 600;">{ctx['articulos']}</td></tr>
+            </table>
+
+            <h3 style="margin: 16px 0 8px 0; color: #111827;">Motivo</h3>
+            <div style="padding: 12px; background: #f3f4f6; border-radius: 8px; color: #374151;">{ctx['motivo']}</div>
+        </div>
+        <p style="text-align: center; color: #9ca3af; font-size: 12px; margin-top: 12px;">GEPE Notificaciones</p>
+    </body>
+    </html>
+    """
+    
+    # Versión plain text para mejor deliverability
+    text_content = f"""
 Arrepentimiento de compra
 
 Se recibió una solicitud de arrepentimiento de compra.
@@ -500,21 +872,71 @@ Motivo:
 
 ---
 GEPE Notificaciones
-        """
-
-        params = {
-            "from": os.getenv("RESEND_FROM_EMAIL", "GEPE <notificaciones@gepesport.com>"),
-            "to": admin_emails,
-            "subject": f"Arrepentimiento de compra - Pedido {numero_pedido}",
-            "html": html_content,
-            "text": text_content,
-        }
-        resend.Emails.send(params)
-        logger.info("Email de arrepentimiento enviado a admins")
-        return True
-    except Exception as e:
-        logger.error(f"Error al enviar email de arrepentimiento: {e}", exc_info=True)
-        return False
+    """
+
+    return await _send_email(
+        to=admin_emails,
+        subject=f"Arrepentimiento de compra - Pedido {numero_pedido}",
+        html=html_content,
+        text=text_content,
+        description="email de arrepentimiento",
+    )
+
+
+# Filas de la versión texto de la notificación de venta
+_SALE_ROW_TEXT = "  - {name}{size} x{quantity} - {price} = {subtotal}\n"
+
+
+def _render_sale_notification(order) -> tuple:
+    """Renderiza HTML y texto de la notificación de venta. Devuelve (html, texto, total formateado)"""
+    total_items = sum(item.quantity for item in order.items)
+    total_formatted = format_price(order.total_amount)
+    
+    html_content = SALE_NOTIFICATION_TMPL.render(order=order, total_items=total_items)
+    
+    # Versión plain text para mejor deliverability
+    products_text = "".join(
+        _SALE_ROW_TEXT.format(
+            name=name,
+            size=_size_text(size),
+            quantity=quantity,
+            price=format_price(unit_price),
+            subtotal=format_price(unit_price * quantity),
+        )
+        for name, size, quantity, unit_price in map(_item_fields, order.items)
+    )
+    
+    shipping_lines = []
+    if order.shipping_method:
+        shipping_method_text = "Envío a domicilio" if order.shipping_method == "domicilio" else "Retiro en local"
+        shipping_lines.append(f"Envío: {shipping_method_text}")
+        if order.shipping_address:
+            shipping_lines.append(f"Dirección: {order.shipping_address}")
+        if order.shipping_city:
+            shipping_lines.append(f"Ciudad: {order.shipping_city}")
+    shipping_text = "".join(f"\n{line}" for line in shipping_lines)
+    
+    text_content = f"""
+Nueva Venta Realizada
+
+Pedido: {order.order_number}
+
+Datos del Cliente:
+- Nombre: {order.customer_name or 'No especificado'}
+- Email: {order.customer_email}
+- Teléfono: {order.customer_phone or 'No especificado'}
+- DNI: {order.customer_dni or 'No especificado'}
+
+Productos ({total_items} items):
+{products_text}
+TOTAL: {total_formatted}
+{shipping_text}
+
+---
+Este es un email automático del sistema de notificaciones de GEPE.
+    """
+
+    return html_content, text_content, total_formatted
 
 
 async def send_sale_notification_email(order, admin_emails: List[str]) -> bool:
@@ -532,180 +954,81 @@ async def send_sale_notification_email(order, admin_emails: List[str]) -> bool:
         logger.warning("Servicio de email no configurado, no se enviará notificación de venta")
         return False
     
+    if _resend_circuit_open("notificación de venta"):
+        return False
+    
     if not admin_emails:
         logger.warning("No hay emails de administradores configurados para recibir notificaciones")
         return False
     
-    try:
-        resend.api_key = _get_resend_api_key()
-        
-        # Preparar lista de productos
-        products_html = ""
-        total_items = 0
-        for item in order.items:
-            size_text = f" (Talle: {item.product_size})" if item.product_size else ""
-            price_formatted = f"${item.unit_price:,.0f}".replace(",", ".")
-            subtotal = item.unit_price * item.quantity
-            subtotal_formatted = f"${subtotal:,.0f}".replace(",", ".")
-            products_html += f"""
-            <tr>
-                <td style="padding: 10px; border-bottom: 1px solid #eee;">{item.product_name}{size_text}</td>
-                <td style="padding: 10px; border-bottom: 1px solid #eee; text-align: center;">{item.quantity}</td>
-                <td style="padding: 10px; border-bottom: 1px solid #eee; text-align: right;">{price_formatted}</td>
-                <td style="padding: 10px; border-bottom: 1px solid #eee; text-align: right; font-weight: bold;">{subtotal_formatted}</td>
-            </tr>
-            """
-            total_items += item.quantity
-        
-        # Formatear total
-        total_formatted = f"${order.total_amount:,.0f}".replace(",", ".")
-        
-        # Información de envío
-        shipping_info = ""
-        if order.shipping_method:
-            shipping_method_text = "Envío a domicilio" if order.shipping_method == "domicilio" else "Retiro en local"
-            shipping_info = f"""
-            <div style="margin-top: 15px; padding: 15px; background: #f3f4f6; border-radius: 8px;">
-                <h4 style="margin: 0 0 10px 0; color: #374151;">📦 Envío</h4>
-                <p style="margin: 0; color: #6b7280;"><strong>Método:</strong> {shipping_method_text}</p>
-            """
-            if order.shipping_address:
-                shipping_info += f'<p style="margin: 5px 0 0 0; color: #6b7280;"><strong>Dirección:</strong> {order.shipping_address}</p>'
-            if order.shipping_city:
-                shipping_info += f'<p style="margin: 5px 0 0 0; color: #6b7280;"><strong>Ciudad:</strong> {order.shipping_city}</p>'
-            shipping_info += "</div>"
-        
-        # HTML del email
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        </head>
-        <body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
-            <div style="background: linear-gradient(135deg, #10b981 0%, #059669 100%); padding: 30px; border-radius: 12px 12px 0 0; text-align: center;">
-                <h1 style="color: white; margin: 0; font-size: 24px;">💰 ¡Nueva Venta Realizada!</h1>
-            </div>
-            
-            <div style="background: #ffffff; padding: 30px; border: 1px solid #e5e7eb; border-top: none; border-radius: 0 0 12px 12px;">
-                <div style="background: #ecfdf5; border: 1px solid #10b981; border-radius: 8px; padding: 15px; margin-bottom: 20px; text-align: center;">
-                    <p style="margin: 0; font-size: 14px; color: #065f46;">Pedido</p>
-                    <p style="margin: 5px 0 0 0; font-size: 24px; font-weight: bold; color: #10b981;">{order.order_number}</p>
-                </div>
-                
-                <h3 style="margin-top: 0; color: #374151; border-bottom: 2px solid #e5e7eb; padding-bottom: 10px;">👤 Datos del Cliente</h3>
-                <table style="width: 100%; margin-bottom: 20px;">
-                    <tr>
-                        <td style="padding: 5px 0; color: #6b7280;">Nombre:</td>
-                        <td style="padding: 5px 0; font-weight: 600;">{order.customer_name or 'No especificado'}</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 5px 0; color: #6b7280;">Email:</td>
-                        <td style="padding: 5px 0; font-weight: 600;">{order.customer_email}</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 5px 0; color: #6b7280;">Teléfono:</td>
-                        <td style="padding: 5px 0; font-weight: 600;">{order.customer_phone or 'No especificado'}</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 5px 0; color: #6b7280;">DNI:</td>
-                        <td style="padding: 5px 0; font-weight: 600;">{order.customer_dni or 'No especificado'}</td>
-                    </tr>
-                </table>
-                
-                <h3 style="color: #374151; border-bottom: 2px solid #e5e7eb; padding-bottom: 10px;">🛒 Productos ({total_items} items)</h3>
-                <table style="width: 100%; border-collapse: collapse; margin-bottom: 20px;">
-                    <thead>
-                        <tr style="background: #f9fafb;">
-                            <th style="padding: 10px; text-align: left; font-weight: 600; color: #374151;">Producto</th>
-                            <th style="padding: 10px; text-align: center; font-weight: 600; color: #374151;">Cant.</th>
-                            <th style="padding: 10px; text-align: right; font-weight: 600; color: #374151;">Precio</th>
-                            <th style="padding: 10px; text-align: right; font-weight: 600; color: #374151;">Subtotal</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-                        {products_html}
-                    </tbody>
-                    <tfoot>
-                        <tr style="background: #10b981; color: white;">
-                            <td colspan="3" style="padding: 12px; font-weight: bold; font-size: 16px;">TOTAL</td>
-                            <td style="padding: 12px; text-align: right; font-weight: bold; font-size: 18px;">{total_formatted}</td>
-                        </tr>
-                    </tfoot>
-                </table>
-                
-                {shipping_info}
-                
-                <hr style="border: none; border-top: 1px solid #e5e7eb; margin: 20px 0;">
-                
-                <p style="font-size: 12px; color: #9ca3af; text-align: center;">
-                    Este es un email automático del sistema de notificaciones de GEPE.
-                </p>
-            </div>
-            
-            <p style="text-align: center; font-size: 12px; color: #9ca3af; margin-top: 20px;">
-                © 2025 GEPE Sport - Indumentaria deportiva
-            </p>
-        </body>
-        </html>
-        """
-        
-        # Versión plain text para mejor deliverability
-        products_text = ""
-        for item in order.items:
-            size_text = f" (Talle: {item.product_size})" if item.product_size else ""
-            price_formatted = f"${item.unit_price:,.0f}".replace(",", ".")
-            subtotal = item.unit_price * item.quantity
-            subtotal_formatted = f"${subtotal:,.0f}".replace(",", ".")
-            products_text += f"  - {item.product_name}{size_text} x{item.quantity} - {price_formatted} = {subtotal_formatted}\n"
-        
-        shipping_text = ""
-        if order.shipping_method:
-            shipping_method_text = "Envío a domicilio" if order.shipping_method == "domicilio" else "Retiro en local"
-            shipping_text = f"\nEnvío: {shipping_method_text}"
-            if order.shipping_address:
-                shipping_text += f"\nDirección: {order.shipping_address}"
-            if order.shipping_city:
-                shipping_text += f"\nCiudad: {order.shipping_city}"
-        
-        text_content = f"""
-Nueva Venta Realizada
+    html_content, text_content, total_formatted = _render_sale_notification(order)
 
-Pedido: {order.order_number}
+    return await _send_email(
+        to=admin_emails,
+        subject=f"Nueva Venta: {order.order_number} - {total_formatted}",
+        html=html_content,
+        text=text_content,
+        description="notificación de venta",
+        separate_recipients=True,
+    )
 
-Datos del Cliente:
-- Nombre: {order.customer_name or 'No especificado'}
-- Email: {order.customer_email}
-- Teléfono: {order.customer_phone or 'No especificado'}
-- DNI: {order.customer_dni or 'No especificado'}
 
-Productos ({total_items} items):
-{products_text}
-TOTAL: {total_formatted}
-{shipping_text}
+async def send_sale_notifications_batch(orders_with_admins: List[tuple]) -> List[bool]:
+    """
+    Envía las notificaciones de venta de varias órdenes a la vez.
+    Los mensajes de todas las órdenes entran en la misma ventana de la cola de envío,
+    así que salen en uno o pocos requests a /emails/batch (hasta 100 mensajes cada uno).
+    
+    Args:
+        orders_with_admins: Lista de tuplas (order, admin_emails)
+        
+    Returns:
+        List[bool]: Resultado del envío de cada orden, en el mismo orden
+    """
+    return list(await asyncio.gather(
+        *(send_sale_notification_email(order, admin_emails) for order, admin_emails in orders_with_admins)
+    ))
+
+
+# Plantillas del email de contacto: solo varían tres campos, así que alcanza con string.Template
+_CONTACT_HTML = string.Template("""
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+</head>
+<body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; line-height: 1.6; color: #1f2937; max-width: 640px; margin: 0 auto; padding: 24px; background: #f9fafb;">
+    <div style="background: #0f172a; color: white; padding: 20px; border-radius: 12px 12px 0 0; text-align: center;">
+        <h1 style="margin: 0; font-size: 20px;">📨 Nuevo mensaje de contacto</h1>
+    </div>
+    <div style="background: white; padding: 24px; border: 1px solid #e5e7eb; border-top: none; border-radius: 0 0 12px 12px;">
+        <h3 style="margin: 0 0 12px 0; color: #111827;">Datos</h3>
+        <table style="width: 100%; border-collapse: collapse; margin-bottom: 16px;">
+            <tr><td style="padding: 6px 0; color: #6b7280;">Nombre</td><td style="padding: 6px 0; font-weight: 600;">$nombre</td></tr>
+            <tr><td style="padding: 6px 0; color: #6b7280;">Email</td><td style="padding: 6px 0; font-weight: 600;">$email</td></tr>
+        </table>
+        <h3 style="margin: 0 0 8px 0; color: #111827;">Mensaje</h3>
+        <div style="padding: 12px; background: #f3f4f6; border-radius: 8px; color: #374151; white-space: pre-wrap;">$mensaje</div>
+    </div>
+    <p style="text-align: center; color: #9ca3af; font-size: 12px; margin-top: 12px;">GEPE Contacto</p>
+</body>
+</html>
+""")
+
+_CONTACT_TEXT = string.Template("""
+Nuevo mensaje de contacto
+
+Datos:
+- Nombre: $nombre
+- Email: $email
+
+Mensaje:
+$mensaje
 
 ---
-Este es un email automático del sistema de notificaciones de GEPE.
-        """
-        
-        # Enviar email a todos los administradores
-        params = {
-            "from": os.getenv("RESEND_FROM_EMAIL", "GEPE <notificaciones@gepesport.com>"),
-            "to": admin_emails,
-            "subject": f"Nueva Venta: {order.order_number} - {total_formatted}",
-            "html": html_content,
-            "text": text_content,
-        }
-        
-        response = resend.Emails.send(params)
-        
-        logger.info(f"Notificación de venta enviada a {len(admin_emails)} administradores. Orden: {order.order_number}, ID: {response.get('id', 'N/A')}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Error al enviar notificación de venta: {str(e)}", exc_info=True)
-        return False
+GEPE Contacto
+""")
 
 
 async def send_contact_email(form_data: dict, admin_emails: List[str]) -> bool:
@@ -716,75 +1039,75 @@ async def send_contact_email(form_data: dict, admin_emails: List[str]) -> bool:
     if not _is_email_service_configured():
         logger.warning("Servicio de email no configurado, no se enviará contacto")
         return False
+    
+    if _resend_circuit_open("contacto"):
+        return False
 
     if not admin_emails:
         logger.warning("No hay emails de administradores configurados para recibir contacto")
         return False
 
-    try:
-        resend.api_key = _get_resend_api_key()
-
-        nombre = form_data.get("nombre", "").strip() or "Sin nombre"
-        email = form_data.get("email", "").strip()
-        mensaje = form_data.get("mensaje", "").strip()
-
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        </head>
-        <body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; line-height: 1.6; color: #1f2937; max-width: 640px; margin: 0 auto; padding: 24px; background: #f9fafb;">
-            <div style="background: #0f172a; color: white; padding: 20px; border-radius: 12px 12px 0 0; text-align: center;">
-                <h1 style="margin: 0; font-size: 20px;">📨 Nuevo mensaje de contacto</h1>
-            </div>
-            <div style="background: white; padding: 24px; border: 1px solid #e5e7eb; border-top: none; border-radius: 0 0 12px 12px;">
-                <h3 style="margin: 0 0 12px 0; color: #111827;">Datos</h3>
-                <table style="width: 100%; border-collapse: collapse; margin-bottom: 16px;">
-                    <tr><td style="padding: 6px 0; color: #6b7280;">Nombre</td><td style="padding: 6px 0; font-weight: 600;">{nombre}</td></tr>
-                    <tr><td style="padding: 6px 0; color: #6b7280;">Email</td><td style="padding: 6px 0; font-weight: 600;">{email or 'No provisto'}</td></tr>
-                </table>
-                <h3 style="margin: 0 0 8px 0; color: #111827;">Mensaje</h3>
-                <div style="padding: 12px; background: #f3f4f6; border-radius: 8px; color: #374151; white-space: pre-wrap;">{mensaje}</div>
-            </div>
-            <p style="text-align: center; color: #9ca3af; font-size: 12px; margin-top: 12px;">GEPE Contacto</p>
-        </body>
-        </html>
-        """
-        
-        # Versión plain text para mejor deliverability
-        text_content = f"""
-Nuevo mensaje de contacto
+    nombre = form_data.get("nombre", "").strip() or "Sin nombre"
+    email = form_data.get("email", "").strip()
+    mensaje = form_data.get("mensaje", "").strip()
 
-Datos:
-- Nombre: {nombre}
-- Email: {email or 'No provisto'}
+    email_text = email or "No provisto"
 
-Mensaje:
-{mensaje}
+    html_content = _CONTACT_HTML.substitute(
+        nombre=escape(nombre),
+        email=escape(email_text),
+        mensaje=escape(mensaje),
+    )
+    
+    # Versión plain text para mejor deliverability
+    text_content = _CONTACT_TEXT.substitute(nombre=nombre, email=email_text, mensaje=mensaje)
 
----
-GEPE Contacto
-        """
+    return await _send_email(
+        to=admin_emails,
+        subject=f"Contacto: {nombre}",
+        html=html_content,
+        text=text_content,
+        reply_to=email,
+        description="email de contacto",
+    )
 
-        params = {
-            "from": os.getenv("RESEND_FROM_EMAIL", "GEPE <notificaciones@gepesport.com>"),
-            "to": admin_emails,
-            "subject": f"Contacto: {nombre}",
-            "html": html_content,
-            "text": text_content,
-        }
 
-        if email:
-            params["reply_to"] = [email]
+# Versión texto del email de confirmación (el HTML está en templates/email/order_confirmation.html)
+_ORDER_CONFIRMATION_TEXT = text_env.from_string("""
+Gracias por tu compra!
 
-        response = resend.Emails.send(params)
-        logger.info(f"Email de contacto enviado a {len(admin_emails)} admins. ID: {response.get('id', 'N/A')}")
-        return True
-    except Exception as e:
-        logger.error(f"Error al enviar email de contacto: {str(e)}", exc_info=True)
-        return False
+Hola {{ order.customer_name or 'Cliente' }},
+
+¡Gracias por elegirnos! Tu pago fue confirmado exitosamente y ya comenzamos a preparar tu pedido.
+
+Número de pedido: {{ order.order_number }}
+
+Resumen de tu compra:
+{% for item in items %}
+  - {{ item.product_name }}{% if item.product_size %} (Talle: {{ item.product_size }}){% endif %} x{{ item.quantity }} - {{ item.unit_price | price }}
+{% endfor %}
+
+TOTAL: {{ order.total_amount | price }}
+{% if order.shipping_method %}
+
+Método de envío: {{ 'Envío a domicilio' if order.shipping_method == 'domicilio' else 'Retiro en local' }}
+{% if order.shipping_address %}
+Dirección: {{ order.shipping_address }}
+{% endif %}
+{% if order.shipping_city %}
+Ciudad: {{ order.shipping_city }}
+{% endif %}
+{% endif %}
+
+Ver estado de tu pedido: {{ tracking_url }}
+
+Tu pedido será confeccionado a medida. Te avisaremos por email cuando esté listo para ser enviado.
+
+¿Tenés alguna pregunta? Respondé a este correo o contactanos por WhatsApp.
+
+---
+GEPE Sport - Indumentaria deportiva
+""")
 
 
 async def send_order_confirmation_email(order) -> bool:
@@ -801,187 +1124,124 @@ async def send_order_confirmation_email(order) -> bool:
         logger.warning("Servicio de email no configurado, no se enviará confirmación de compra")
         return False
     
+    if _resend_circuit_open("confirmación de compra"):
+        return False
+    
     if not order.customer_email:
-        logger.warning(f"Orden {order.id} no tiene email de cliente")
+        logger.warning("Orden %s no tiene email de cliente", order.id)
         return False
     
-    try:
-        resend.api_key = _get_resend_api_key()
-        
-        # Preparar lista de productos
-        products_html = ""
-        total_items = 0
-        for item in order.items:
-            size_text = f" (Talle: {item.product_size})" if item.product_size else ""
-            price_formatted = f"${item.unit_price:,.0f}".replace(",", ".")
-            subtotal = item.unit_price * item.quantity
-            subtotal_formatted = f"${subtotal:,.0f}".replace(",", ".")
-            products_html += f"""
-            <tr>
-                <td style="padding: 10px; border-bottom: 1px solid #eee;">{item.product_name}{size_text}</td>
-                <td style="padding: 10px; border-bottom: 1px solid #eee; text-align: center;">{item.quantity}</td>
-                <td style="padding: 10px; border-bottom: 1px solid #eee; text-align: right;">{price_formatted}</td>
-                <td style="padding: 10px; border-bottom: 1px solid #eee; text-align: right; font-weight: bold;">{subtotal_formatted}</td>
-            </tr>
-            """
-            total_items += item.quantity
-        
-        # Formatear total
-        total_formatted = f"${order.total_amount:,.0f}".replace(",", ".")
-        
-        # Información de envío
-        shipping_info = ""
-        if order.shipping_method:
-            shipping_method_text = "Envío a domicilio" if order.shipping_method == "domicilio" else "Retiro en local"
-            shipping_info = f"""
-            <div style="margin-top: 20px; padding: 15px; background: #f0fdf4; border: 1px solid #10b981; border-radius: 8px;">
-                <h4 style="margin: 0 0 10px 0; color: #065f46;">📦 Datos de envío</h4>
-                <p style="margin: 0; color: #047857;"><strong>Método:</strong> {shipping_method_text}</p>
-            """
-            if order.shipping_address:
-                shipping_info += f'<p style="margin: 5px 0 0 0; color: #047857;"><strong>Dirección:</strong> {order.shipping_address}</p>'
-            if order.shipping_city:
-                shipping_info += f'<p style="margin: 5px 0 0 0; color: #047857;"><strong>Ciudad:</strong> {order.shipping_city}</p>'
-            if order.shipping_province:
-                shipping_info += f'<p style="margin: 5px 0 0 0; color: #047857;"><strong>Provincia:</strong> {order.shipping_province}</p>'
-            shipping_info += "</div>"
-        
-        # URL del sitio
-        site_url = os.getenv("FRONTEND_URL", "https://gepesport.com")
-        tracking_url = f"{site_url}/pedidos/{order.id}?email={order.customer_email}"
-        
-        # HTML del email
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        </head>
-        <body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
-            <div style="background: linear-gradient(135deg, #10b981 0%, #059669 100%); padding: 30px; border-radius: 12px 12px 0 0; text-align: center;">
-                <h1 style="color: white; margin: 0; font-size: 24px;">✅ ¡Gracias por tu compra!</h1>
-            </div>
-            
-            <div style="background: #ffffff; padding: 30px; border: 1px solid #e5e7eb; border-top: none; border-radius: 0 0 12px 12px;">
-                <p style="font-size: 16px;">Hola <strong>{order.customer_name or 'Cliente'}</strong>,</p>
-                
-                <p>¡Gracias por elegirnos! Tu pago fue confirmado exitosamente y ya comenzamos a preparar tu pedido.</p>
-                
-                <div style="background: #ecfdf5; border: 1px solid #10b981; border-radius: 8px; padding: 15px; margin: 20px 0; text-align: center;">
-                    <p style="margin: 0; font-size: 14px; color: #065f46;">Número de pedido</p>
-                    <p style="margin: 5px 0 0 0; font-size: 24px; font-weight: bold; color: #10b981;">{order.order_number}</p>
-                </div>
-                
-                <h3 style="color: #374151; border-bottom: 2px solid #e5e7eb; padding-bottom: 10px;">🛒 Resumen de tu compra</h3>
-                <table style="width: 100%; border-collapse: collapse; margin-bottom: 20px;">
-                    <thead>
-                        <tr style="background: #f9fafb;">
-                            <th style="padding: 10px; text-align: left; font-weight: 600; color: #374151;">Producto</th>
-                            <th style="padding: 10px; text-align: center; font-weight: 600; color: #374151;">Cant.</th>
-                            <th style="padding: 10px; text-align: right; font-weight: 600; color: #374151;">Precio</th>
-                            <th style="padding: 10px; text-align: right; font-weight: 600; color: #374151;">Subtotal</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-                        {products_html}
-                    </tbody>
-                    <tfoot>
-                        <tr style="background: #10b981; color: white;">
-                            <td colspan="3" style="padding: 12px; font-weight: bold; font-size: 16px;">TOTAL</td>
-                            <td style="padding: 12px; text-align: right; font-weight: bold; font-size: 18px;">{total_formatted}</td>
-                        </tr>
-                    </tfoot>
-                </table>
-                
-                {shipping_info}
-                
-                <!-- Botón de seguimiento -->
-                <div style="text-align: center; margin: 25px 0;">
-                    <a href="{tracking_url}" style="display: inline-block; background: linear-gradient(135deg, #10b981 0%, #059669 100%); color: white; text-decoration: none; padding: 14px 28px; border-radius: 8px; font-weight: bold; font-size: 16px;">
-                        📦 Ver estado de mi pedido
-                    </a>
-                </div>
-                
-                <div style="margin-top: 20px; padding: 15px; background: #fef3c7; border: 1px solid #f59e0b; border-radius: 8px;">
-                    <h4 style="margin: 0 0 8px 0; color: #92400e;">⏱️ ¿Qué sigue?</h4>
-                    <p style="margin: 0; font-size: 14px; color: #92400e;">
-                        Tu pedido será confeccionado a medida. Te avisaremos por email cuando esté listo para ser enviado.
-                    </p>
-                </div>
-                
-                <hr style="border: none; border-top: 1px solid #e5e7eb; margin: 20px 0;">
-                
-                <p style="font-size: 12px; color: #9ca3af; text-align: center;">
-                    ¿Tenés alguna pregunta? Respondé a este correo o contactanos por WhatsApp.
-                </p>
-            </div>
-            
-            <p style="text-align: center; font-size: 12px; color: #9ca3af; margin-top: 20px;">
-                © 2025 GEPE Sport - Indumentaria deportiva
-            </p>
-        </body>
-        </html>
-        """
-        
-        # Versión plain text
-        products_text = ""
-        for item in order.items:
-            size_text = f" (Talle: {item.product_size})" if item.product_size else ""
-            price_formatted = f"${item.unit_price:,.0f}".replace(",", ".")
-            products_text += f"  - {item.product_name}{size_text} x{item.quantity} - {price_formatted}\n"
-        
-        shipping_text = ""
-        if order.shipping_method:
-            shipping_method_text = "Envío a domicilio" if order.shipping_method == "domicilio" else "Retiro en local"
-            shipping_text = f"\nMétodo de envío: {shipping_method_text}"
-            if order.shipping_address:
-                shipping_text += f"\nDirección: {order.shipping_address}"
-            if order.shipping_city:
-                shipping_text += f"\nCiudad: {order.shipping_city}"
-        
-        text_content = f"""
-Gracias por tu compra!
+    # El email va codificado: un "+" sin escapar llega al frontend como espacio
+    tracking_url = f"{_get_frontend_url()}/pedidos/{order.id}?{urlencode({'email': order.customer_email})}"
+    
+    html_content = ORDER_CONFIRMATION_TMPL.render(order=order, tracking_url=tracking_url)
+    
+    # Versión plain text
+    text_content = _ORDER_CONFIRMATION_TEXT.render(
+        order=order,
+        items=order.items,
+        tracking_url=tracking_url,
+    )
+
+    return await _send_email(
+        to=[order.customer_email],
+        subject=f"Confirmacion de compra - Pedido {order.order_number}",
+        html=html_content,
+        text=text_content,
+        reply_to=_get_default_reply_to(),
+        description="email de confirmación",
+    )
+
+
+# ---------------------------------------------------------------------------
+# Envío en segundo plano
+# ---------------------------------------------------------------------------
+# Para los flujos donde quien llama no necesita saber si el email se entregó
+# (ej: notificación de venta a admins), el envío se programa como tarea y la
+# respuesta HTTP no espera el round trip a Resend.
+
+_EMAIL_SEMAPHORE = _LoopSemaphore(20)
+
+# Referencias a las tareas en curso para que el GC no las descarte a mitad de envío
+_pending_email_tasks: set = set()
+
+_ORDER_EMAIL_FIELDS = (
+    "id", "order_number", "total_amount",
+    "customer_name", "customer_email", "customer_phone", "customer_dni",
+    "shipping_method", "shipping_address", "shipping_city", "shipping_province",
+    "tracking_code", "tracking_company", "tracking_branch_address",
+)
+
+
+def _snapshot_order(order) -> SimpleNamespace:
+    """
+    Copia los datos de la orden y sus items a objetos planos.
+    La tarea en segundo plano corre después de cerrar la sesión de DB del request,
+    así que no puede depender de la carga lazy de SQLAlchemy.
+    """
+    snapshot = SimpleNamespace(**{field: getattr(order, field, None) for field in _ORDER_EMAIL_FIELDS})
+    snapshot.items = [
+        SimpleNamespace(**{field: getattr(item, field) for field in _ITEM_EMAIL_FIELDS})
+        for item in order.items
+    ]
+    return snapshot
+
+
+async def _run_email_task(send_func, *args) -> None:
+    """Ejecuta un envío respetando el límite de envíos concurrentes"""
+    async with _EMAIL_SEMAPHORE:
+        try:
+            await send_func(*args)
+        except Exception as e:
+            # Las funciones send_* ya loguean sus errores; esto cubre lo que falle antes
+            # (ej: la lectura de la orden) para que la excepción no quede sin observar
+            logger.error("Error en envío de email en segundo plano (%s): %s", send_func.__name__, e, exc_info=True)
+
+
+def _schedule_email(send_func, *args, background_tasks: Optional[BackgroundTasks] = None) -> None:
+    """
+    Programa un envío sin esperar su resultado.
+    Con background_tasks (endpoints de FastAPI) corre después de enviar la respuesta;
+    sin él se crea una tarea de asyncio.
+    """
+    if background_tasks is not None:
+        background_tasks.add_task(_run_email_task, send_func, *args)
+        return
+    task = asyncio.create_task(_run_email_task(send_func, *args))
+    _pending_email_tasks.add(task)
+    task.add_done_callback(_pending_email_tasks.discard)
 
-Hola {order.customer_name or 'Cliente'},
 
-¡Gracias por elegirnos! Tu pago fue confirmado exitosamente y ya comenzamos a preparar tu pedido.
+def _load_order_snapshot(order_id: int) -> Optional[SimpleNamespace]:
+    """Lee la orden con sus items en una sesión de DB propia y devuelve una copia plana"""
+    from sqlalchemy.orm import joinedload
+    from ..database import SessionLocal
+    from ..models.order import Order
 
-Número de pedido: {order.order_number}
-
-Resumen de tu compra:
-{products_text}
-TOTAL: {total_formatted}
-{shipping_text}
+    db = SessionLocal()
+    try:
+        order = db.query(Order).options(joinedload(Order.items)).filter(Order.id == order_id).first()
+        return _snapshot_order(order) if order else None
+    finally:
+        db.close()
 
-Ver estado de tu pedido: {tracking_url}
 
-Tu pedido será confeccionado a medida. Te avisaremos por email cuando esté listo para ser enviado.
+async def _send_sale_notification_for_order(order_id: int, admin_emails: List[str]) -> bool:
+    """Relee la orden desde la DB y envía la notificación de venta"""
+    order = await asyncio.to_thread(_load_order_snapshot, order_id)
+    if order is None:
+        logger.warning("Orden %s no encontrada, no se enviará notificación de venta", order_id)
+        return False
+    return await send_sale_notification_email(order, admin_emails)
 
-¿Tenés alguna pregunta? Respondé a este correo o contactanos por WhatsApp.
 
----
-GEPE Sport - Indumentaria deportiva
-        """
-        
-        # Enviar email
-        params = {
-            "from": os.getenv("RESEND_FROM_EMAIL", "GEPE <notificaciones@gepesport.com>"),
-            "to": [order.customer_email],
-            "subject": f"Confirmacion de compra - Pedido {order.order_number}",
-            "html": html_content,
-            "text": text_content,
-        }
-
-        reply_to = _get_default_reply_to()
-        if reply_to:
-            params["reply_to"] = [reply_to]
-        
-        response = resend.Emails.send(params)
-        
-        logger.info(f"Email de confirmación enviado a {order.customer_email}. Orden: {order.order_number}, ID: {response.get('id', 'N/A')}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Error al enviar email de confirmación: {str(e)}", exc_info=True)
-        return False
+def schedule_sale_notification_email(
+    order_id: int, admin_emails: List[str], background_tasks: Optional[BackgroundTasks] = None
+) -> None:
+    """
+    Programa en segundo plano la notificación de venta a los administradores.
+    Recibe solo el ID: la lectura de la orden, el render y el envío quedan fuera del request.
+    """
+    _schedule_email(
+        _send_sale_notification_for_order, order_id, list(admin_emails), background_tasks=background_tasks
+    )
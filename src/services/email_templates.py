@@ -0,0 +1,43 @@
+"""
+Plantillas de los emails transaccionales.
+Los cuerpos HTML viven en templates/email/*.html y se compilan una sola vez al importar el módulo.
+Los archivos que empiezan con "_" son parciales (encabezado y pie comunes) que incluyen los demás.
+"""
+import functools
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+_TEMPLATES_DIR = Path(__file__).parent / "templates" / "email"
+
+_THOUSANDS_TO_DOT = str.maketrans(",", ".")
+
+
+# Los precios unitarios se repiten mucho entre items y pedidos (son pocos niveles de precio)
+@functools.lru_cache(maxsize=512)
+def format_price(amount: float) -> str:
+    """Formatea un monto en pesos con puntos como separador de miles (ej: $59.900)"""
+    return f"${amount:,.0f}".translate(_THOUSANDS_TO_DOT)
+
+
+# Las plantillas no cambian con el proceso en ejecución: sin auto_reload (no se
+# revisa el mtime de los archivos en cada uso) y con caché sin límite.
+html_env = Environment(
+    loader=FileSystemLoader(_TEMPLATES_DIR),
+    autoescape=select_autoescape(enabled_extensions=("html",), default_for_string=True),
+    auto_reload=False,
+    cache_size=-1,
+    trim_blocks=True,
+    lstrip_blocks=True,
+)
+
+# Texto plano: sin autoescape
+text_env = Environment(autoescape=False, trim_blocks=True, lstrip_blocks=True)
+
+html_env.filters["price"] = text_env.filters["price"] = format_price
+
+PRODUCTION_COMPLETE_TMPL = html_env.get_template("production_complete.html")
+ORDER_SHIPPED_TMPL = html_env.get_template("order_shipped.html")
+SALE_NOTIFICATION_TMPL = html_env.get_template("sale_notification.html")
+TEST_TMPL = html_env.get_template("test.html")
+ORDER_CONFIRMATION_TMPL = html_env.get_template("order_confirmation.html")
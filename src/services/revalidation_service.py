@@ -3,8 +3,11 @@ Servicio para notificar al frontend (Vercel) que debe revalidar páginas cachead
 Esto permite que los cambios en el admin se reflejen inmediatamente en la web.
 """
 import os
+import asyncio
+import importlib.util
 import httpx
 import logging
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
@@ -12,23 +15,90 @@ logger = logging.getLogger(__name__)
 FRONTEND_URL = os.getenv("FRONTEND_URL", os.getenv("CORS_ORIGIN", "http://localhost:3000"))
 REVALIDATE_SECRET = os.getenv("REVALIDATE_SECRET", "gepe-revalidate-secret-2024")
 
+# HTTP/2 solo si está instalado el paquete h2 (httpx[http2])
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
 
-async def revalidate_frontend(
+# Cliente compartido del loop principal: las revalidaciones seguidas reutilizan la conexión
+# keep-alive con Vercel en lugar de pagar TCP + TLS en cada llamada.
+# Sus conexiones pertenecen al loop que lo creó, por eso se guarda ese loop junto al cliente.
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Loop principal de la app. Los endpoints sync corren en el threadpool (sin loop propio),
+# así que programan la revalidación en este loop para usar el cliente compartido
+_main_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Referencias a las tareas en curso para que el GC no las descarte
+_pending_tasks: set = set()
+
+
+def _on_main_loop() -> bool:
+    """Indica si el código corre en el loop principal de la app"""
+    try:
+        return _main_loop is not None and asyncio.get_running_loop() is _main_loop
+    except RuntimeError:
+        return False
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Devuelve el cliente HTTP compartido del loop principal, creándolo la primera vez"""
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    if _http_client_loop is not loop:
+        # Cliente de un loop anterior (ej: la app se reinició en el mismo proceso): se descarta
+        _http_client = None
+        _http_client_loop = loop
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=10.0,
+            http2=_HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_keepalive_connections=5),
+        )
+    return _http_client
+
+
+async def close_revalidation_http_client() -> None:
+    """Cierra el cliente HTTP compartido. Llamar al apagar la app"""
+    global _http_client
+    # Un cliente de otro loop ya no se puede cerrar desde acá: solo se descarta
+    if _http_client is not None and _http_client_loop is asyncio.get_running_loop():
+        await _http_client.aclose()
+    _http_client = None
+
+
+def bind_revalidation_loop(loop: asyncio.AbstractEventLoop) -> None:
+    """Registra el loop principal de la app. Llamar al iniciar la app"""
+    global _main_loop
+    _main_loop = loop
+
+
+def schedule_revalidation(coro) -> None:
+    """
+    Dispara una revalidación sin esperar su resultado.
+    Funciona tanto desde código async (endpoints async) como desde endpoints sync del threadpool.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    if loop is not None:
+        task = loop.create_task(coro)
+        _pending_tasks.add(task)
+        task.add_done_callback(_pending_tasks.discard)
+    elif _main_loop is not None and _main_loop.is_running():
+        asyncio.run_coroutine_threadsafe(coro, _main_loop)
+    else:
+        # Sin loop principal (ej: scripts): ejecutar en un loop temporal
+        asyncio.run(coro)
+
+
+async def _post_revalidation(
     type: str | None = None,
     paths: list[str] | None = None,
     tags: list[str] | None = None
 ) -> bool:
-    """
-    Notifica al frontend que debe revalidar ciertas páginas.
-    
-    Args:
-        type: Tipo de contenido cambiado ("product", "club", "prices", "hero")
-        paths: Lista de paths específicos a revalidar (ej: ["/producto/camiseta-river"])
-        tags: Lista de tags a revalidar
-    
-    Returns:
-        True si la revalidación fue exitosa, False en caso contrario
-    """
+    """Hace el POST de revalidación al frontend"""
     try:
         url = f"{FRONTEND_URL.rstrip('/')}/api/revalidate"
         
@@ -43,16 +113,21 @@ async def revalidate_frontend(
         if tags:
             payload["tags"] = tags
             
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(url, json=payload)
-            
-            if response.status_code == 200:
-                data = response.json()
-                logger.info(f"[Revalidate] Success: {data.get('items', [])}")
-                return True
-            else:
-                logger.warning(f"[Revalidate] Failed with status {response.status_code}: {response.text}")
-                return False
+        if _on_main_loop():
+            response = await _get_http_client().post(url, json=payload)
+        else:
+            # Fuera del loop principal (scripts, loops temporales del threadpool):
+            # cliente propio para no compartir conexiones entre loops
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                response = await client.post(url, json=payload)
+        
+        if response.status_code == 200:
+            data = response.json()
+            logger.info(f"[Revalidate] Success: {data.get('items', [])}")
+            return True
+        else:
+            logger.warning(f"[Revalidate] Failed with status {response.status_code}: {response.text}")
+            return False
                 
     except httpx.TimeoutException:
         logger.warning("[Revalidate] Timeout - frontend may be slow or unavailable")
@@ -63,6 +138,97 @@ async def revalidate_frontend(
         return False
 
 
+class RevalidationBatcher:
+    """
+    Junta las revalidaciones que llegan dentro de una ventana corta y las manda en un solo POST
+    por tipo, con los paths y tags combinados sin repetir.
+    Ej: editar varios productos seguidos genera una sola llamada a Vercel en lugar de una por producto.
+    """
+
+    def __init__(self, max_wait: float = 0.2, max_items: int = 20):
+        self.max_wait = max_wait
+        self.max_items = max_items
+        # tipo -> (paths, tags, futures); los dict se usan como sets ordenados
+        self._pending: dict = {}
+        self._count = 0
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def submit(
+        self,
+        type: str | None = None,
+        paths: list[str] | None = None,
+        tags: list[str] | None = None
+    ) -> bool:
+        """Encola una revalidación y espera el resultado del POST que la incluya"""
+        future = asyncio.get_running_loop().create_future()
+        pending_paths, pending_tags, futures = self._pending.setdefault(type, ({}, {}, []))
+        pending_paths.update(dict.fromkeys(paths or ()))
+        pending_tags.update(dict.fromkeys(tags or ()))
+        futures.append(future)
+        self._count += 1
+
+        if self._count >= self.max_items:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_wait())
+        return await future
+
+    async def _flush_after_wait(self) -> None:
+        await asyncio.sleep(self.max_wait)
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Envía ya todo lo pendiente (también sirve al apagar la app)"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        self._flush_task = None
+        pending, self._pending, self._count = self._pending, {}, 0
+
+        async def post_group(type, paths, tags, futures):
+            success = await _post_revalidation(type, list(paths) or None, list(tags) or None)
+            for future in futures:
+                if not future.done():
+                    future.set_result(success)
+
+        await asyncio.gather(*(
+            post_group(type, paths, tags, futures)
+            for type, (paths, tags, futures) in pending.items()
+        ))
+
+
+# Solo se usa desde el loop principal: sus futures y su tarea de flush pertenecen a ese loop
+_batcher = RevalidationBatcher()
+
+
+async def flush_revalidations() -> None:
+    """Envía las revalidaciones pendientes. Llamar al apagar la app"""
+    await _batcher.flush()
+
+
+async def revalidate_frontend(
+    type: str | None = None,
+    paths: list[str] | None = None,
+    tags: list[str] | None = None
+) -> bool:
+    """
+    Notifica al frontend que debe revalidar ciertas páginas.
+    
+    Args:
+        type: Tipo de contenido cambiado ("product", "club", "prices", "hero")
+        paths: Lista de paths específicos a revalidar (ej: ["/producto/camiseta-river"])
+        tags: Lista de tags a revalidar
+    
+    Returns:
+        True si la revalidación fue exitosa, False en caso contrario
+    """
+    if not _on_main_loop():
+        # Loop temporal (scripts, endpoints sync sin la app iniciada): sin agrupación,
+        # el batcher es del loop principal y no puede compartirse entre loops/threads
+        return await _post_revalidation(type, paths, tags)
+    return await _batcher.submit(type, paths, tags)
+
+
 async def revalidate_product(slug: str | None = None):
     """Revalida páginas relacionadas con productos."""
     paths = ["/"]  # Home siempre
@@ -1,4 +1,26 @@
 import re
+import unicodedata
+
+
+def _build_accent_table() -> dict:
+    """
+    Tabla para str.translate que reemplaza cada letra latina acentuada (À-ſ) por su letra base,
+    lo mismo que hace NFD + quitar diacríticos pero en una sola pasada en C.
+    """
+    table = {}
+    for codepoint in range(0xC0, 0x180):
+        decomposed = unicodedata.normalize('NFD', chr(codepoint))
+        base = ''.join(char for char in decomposed if unicodedata.category(char) != 'Mn')
+        if base != chr(codepoint):
+            table[codepoint] = base
+    return table
+
+
+_ACCENT_TABLE = _build_accent_table()
+
+_RE_SPACES = re.compile(r'\s+')
+_RE_INVALID_CHARS = re.compile(r'[^a-z0-9\-]+')
+_RE_DASHES = re.compile(r'\-+')
 
 
 def slugify(text: str) -> str:
@@ -10,32 +32,31 @@ def slugify(text: str) -> str:
     - "Camiseta Élite" -> "camiseta-elite"
     - "San Martín de Monte Comán" -> "san-martin-de-monte-coman"
     """
-    import unicodedata
-    
     if not text:
         return ""
     
     # Convertir a minúsculas y eliminar espacios al inicio/final
     slug = text.lower().strip()
     
-    # Normalizar Unicode: NFD separa caracteres base de diacríticos
-    slug = unicodedata.normalize('NFD', slug)
+    # Eliminar tildes y acentos de las letras latinas con la tabla precalculada
+    slug = slug.translate(_ACCENT_TABLE)
     
-    # Eliminar diacríticos (tildes, acentos)
-    slug = ''.join(char for char in slug if unicodedata.category(char) != 'Mn')
+    # Si quedó algún carácter fuera de la tabla, normalizar Unicode: NFD separa
+    # caracteres base de diacríticos y después se descartan los diacríticos
+    if not slug.isascii():
+        slug = unicodedata.normalize('NFD', slug)
+        slug = ''.join(char for char in slug if unicodedata.category(char) != 'Mn')
     
     # Reemplazar espacios por guiones
-    slug = re.sub(r'\s+', '-', slug)
+    slug = _RE_SPACES.sub('-', slug)
     
     # Eliminar cualquier carácter que no sea letra, número o guión
-    slug = re.sub(r'[^a-z0-9\-]+', '', slug)
+    slug = _RE_INVALID_CHARS.sub('', slug)
     
     # Reemplazar múltiples guiones consecutivos con uno solo
-    slug = re.sub(r'\-+', '-', slug)
+    slug = _RE_DASHES.sub('-', slug)
     
     # Eliminar guiones al inicio y al final
     slug = slug.strip('-')
     
     return slug
-
-
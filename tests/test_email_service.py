@@ -0,0 +1,118 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from src.services import email_service
+
+
+class _MockResend:
+    """API de Resend simulada con httpx.MockTransport. Registra cada request recibido"""
+
+    def __init__(self):
+        self.requests = []
+        self.fail_with = {}  # path -> lista de status a devolver en los próximos requests
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        body = json.loads(request.content)
+        self.requests.append((path, body, request.headers.get("idempotency-key")))
+        pending_failures = self.fail_with.get(path)
+        if pending_failures:
+            return httpx.Response(pending_failures.pop(0), json={"message": "error simulado"})
+        if path == "/emails/batch":
+            return httpx.Response(200, json={"data": [{"id": f"b{i}"} for i in range(len(body))]})
+        return httpx.Response(200, json={"id": f"em{len(self.requests)}"})
+
+    async def get_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(base_url="https://resend.test", transport=httpx.MockTransport(self.handler))
+
+    @property
+    def paths(self):
+        return [path for path, _, _ in self.requests]
+
+
+@pytest.fixture
+def resend(monkeypatch):
+    monkeypatch.setenv("RESEND_API_KEY", "re_test")
+    monkeypatch.setenv("RESEND_RATE_LIMIT", "1000")
+    email_service.reload_config()
+    mock = _MockResend()
+    monkeypatch.setattr(email_service, "_get_http_client", mock.get_client)
+    monkeypatch.setattr(email_service, "_SEND_BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(
+        email_service,
+        "_resend_circuit",
+        email_service._CircuitBreaker(email_service._CIRCUIT_FAIL_MAX, email_service._CIRCUIT_RESET_TIMEOUT),
+    )
+    yield mock
+    email_service.reload_config()
+
+
+def _run(coro):
+    """Ejecuta el envío y apaga el batcher en el mismo loop"""
+    async def main():
+        try:
+            return await coro
+        finally:
+            await email_service.stop_email_batcher()
+
+    return asyncio.run(main())
+
+
+async def _send_test_emails(count: int):
+    return await asyncio.gather(*(email_service.send_test_email(f"user{i}@test.com") for i in range(count)))
+
+
+def test_concurrent_sends_are_coalesced_into_one_batch(resend):
+    assert _run(_send_test_emails(3)) == [True, True, True]
+    assert resend.paths == ["/emails/batch"]
+    assert sorted(message["to"][0] for message in resend.requests[0][1]) == [
+        "user0@test.com", "user1@test.com", "user2@test.com",
+    ]
+
+
+def test_retries_reuse_the_idempotency_key(resend):
+    resend.fail_with["/emails"] = [503, 503]
+
+    assert _run(email_service.send_test_email("user@test.com")) is True
+    assert resend.paths == ["/emails"] * 3
+    keys = {key for _, _, key in resend.requests}
+    assert len(keys) == 1 and None not in keys
+
+
+def test_rejected_batch_falls_back_to_individual_sends(resend):
+    resend.fail_with["/emails/batch"] = [422]
+
+    assert _run(_send_test_emails(2)) == [True, True]
+    assert resend.paths == ["/emails/batch", "/emails", "/emails"]
+
+
+def test_circuit_opens_after_consecutive_failures(resend, monkeypatch):
+    monkeypatch.setattr(email_service, "_SEND_MAX_ATTEMPTS", 1)
+    resend.fail_with["/emails"] = [503] * email_service._CIRCUIT_FAIL_MAX
+
+    async def send_until_open():
+        results = []
+        for _ in range(email_service._CIRCUIT_FAIL_MAX + 1):
+            results.append(await email_service.send_test_email("user@test.com"))
+        return results
+
+    assert _run(send_until_open()) == [False] * (email_service._CIRCUIT_FAIL_MAX + 1)
+    # El último envío no llega a Resend: el circuito ya está abierto
+    assert len(resend.requests) == email_service._CIRCUIT_FAIL_MAX
+
+
+def test_stop_email_batcher_drains_the_queue(resend):
+    async def enqueue_and_stop():
+        futures = [
+            email_service._enqueue_email({"to": [f"user{i}@test.com"], "subject": "Hola", "html": "<p>Hola</p>"})
+            for i in range(3)
+        ]
+        await email_service.stop_email_batcher()
+        return futures
+
+    futures = asyncio.run(enqueue_and_stop())
+    assert [future.result() for future in futures] == ["b0", "b1", "b2"]
+    assert resend.paths == ["/emails/batch"]
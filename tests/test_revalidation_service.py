@@ -0,0 +1,56 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.services import revalidation_service
+
+
+@pytest.fixture
+def posts(monkeypatch):
+    """Reemplaza el POST a Vercel y registra cada llamada"""
+    calls = []
+
+    async def fake_post(type=None, paths=None, tags=None):
+        await asyncio.sleep(0.05)
+        calls.append((type, paths, tags))
+        return True
+
+    monkeypatch.setattr(revalidation_service, "_post_revalidation", fake_post)
+    monkeypatch.setattr(revalidation_service, "_main_loop", None)
+    monkeypatch.setattr(revalidation_service, "_batcher", revalidation_service.RevalidationBatcher())
+    return calls
+
+
+def test_revalidations_on_main_loop_are_coalesced(posts):
+    async def main():
+        revalidation_service.bind_revalidation_loop(asyncio.get_running_loop())
+        return await asyncio.gather(
+            revalidation_service.revalidate_product("a"),
+            revalidation_service.revalidate_product("b"),
+            revalidation_service.revalidate_product("a"),
+            revalidation_service.revalidate_prices(),
+        )
+
+    assert asyncio.run(main()) == [True, True, True, True]
+    assert sorted(posts, key=lambda call: call[0]) == [
+        ("prices", None, None),
+        ("products", ["/", "/producto/a", "/producto/b"], None),
+    ]
+
+
+def test_fallback_from_several_threads_posts_directly(posts):
+    threads = [
+        threading.Thread(
+            target=revalidation_service.schedule_revalidation,
+            args=(revalidation_service.revalidate_product(slug),),
+        )
+        for slug in ("a", "b")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert sorted(paths for _, paths, _ in posts) == [["/", "/producto/a"], ["/", "/producto/b"]]
@@ -0,0 +1,13 @@
+from src.utils import slugify
+
+
+def test_slugify_removes_accents():
+    assert slugify("Club Atlético") == "club-atletico"
+    assert slugify("Camiseta Élite") == "camiseta-elite"
+
+
+def test_slugify_non_ascii_fallback():
+    # "ß" no está en la tabla de acentos ni se descompone con NFD: se descarta
+    assert slugify("Straße Ñandú") == "strae-nandu"
+    # "ǎ" queda fuera de la tabla pero NFD lo descompone en "a" + diacrítico
+    assert slugify("Ǎrbol") == "arbol"
@@ -8,6 +8,7 @@ Este script actualiza el campo 'role' en la tabla 'user' de betterAuth.
 import sqlite3
 import sys
 import io
+from contextlib import closing
 from pathlib import Path
 
 # Configurar stdout para UTF-8 en Windows
@@ -23,62 +24,72 @@ USER_ID = "uPVMYk7rUvqc8TLxbqKCdgCR1wXVKrZu"
 NEW_ROLE = "admin"
 
 
-def update_user_role():
-    """Actualiza el rol del usuario en la base de datos."""
+def _find_default_user(cursor):
+    """Busca el usuario configurado arriba por ID o email."""
+    cursor.execute(
+        "SELECT id, email, role FROM user WHERE id = ? OR email = ?",
+        (USER_ID, USER_EMAIL)
+    )
+    return cursor.fetchone()
+
+
+def update_user_role(rows: list[tuple[str, str]] | None = None):
+    """
+    Actualiza el rol de uno o varios usuarios en la base de datos.
+    
+    Args:
+        rows: Lista de tuplas (rol, id_usuario). Si no se indica, se actualiza
+              el usuario configurado arriba (USER_ID / USER_EMAIL) a NEW_ROLE.
+    """
     try:
-        # Conectar a la base de datos
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Verificar que el usuario existe
-        cursor.execute(
-            "SELECT id, email, role FROM user WHERE id = ? OR email = ?",
-            (USER_ID, USER_EMAIL)
-        )
-        user = cursor.fetchone()
-        
-        if not user:
-            print(f"[ERROR] No se encontro el usuario con ID '{USER_ID}' o email '{USER_EMAIL}'")
-            return False
-        
-        user_id, user_email, current_role = user
-        print(f"[OK] Usuario encontrado:")
-        print(f"   ID: {user_id}")
-        print(f"   Email: {user_email}")
-        print(f"   Rol actual: {current_role}")
-        
-        # Actualizar el rol
-        cursor.execute(
-            "UPDATE user SET role = ? WHERE id = ?",
-            (NEW_ROLE, user_id)
-        )
-        
-        # Confirmar los cambios
-        conn.commit()
-        
-        # Verificar que se actualizó correctamente
-        cursor.execute("SELECT role FROM user WHERE id = ?", (user_id,))
-        updated_role = cursor.fetchone()[0]
-        
-        if updated_role == NEW_ROLE:
-            print(f"[OK] Rol actualizado exitosamente a '{NEW_ROLE}'")
-            conn.close()
-            return True
-        else:
-            print(f"[ERROR] El rol no se actualizo correctamente. Rol actual: {updated_role}")
-            conn.close()
-            return False
+        # closing() garantiza el cierre de la conexión en cualquier salida
+        with closing(sqlite3.connect(DB_PATH)) as conn:
+            cursor = conn.cursor()
+            
+            # WAL: no bloquea a los lectores (la app en ejecución) mientras se escribe,
+            # y con synchronous=NORMAL no se hace fsync en cada commit
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            
+            if rows is None:
+                # Verificar que el usuario existe
+                user = _find_default_user(cursor)
+                
+                if not user:
+                    print(f"[ERROR] No se encontro el usuario con ID '{USER_ID}' o email '{USER_EMAIL}'")
+                    return False
+                
+                user_id, user_email, current_role = user
+                print(f"[OK] Usuario encontrado:")
+                print(f"   ID: {user_id}")
+                print(f"   Email: {user_email}")
+                print(f"   Rol actual: {current_role}")
+                rows = [(NEW_ROLE, user_id)]
+            
+            # Actualizar los roles en una sola transacción: commit al salir del with,
+            # rollback automático si algo falla
+            with conn:
+                cursor.executemany("UPDATE user SET role = ? WHERE id = ?", rows)
+            
+            # Verificar que se actualizó correctamente
+            success = True
+            for new_role, user_id in rows:
+                cursor.execute("SELECT role FROM user WHERE id = ?", (user_id,))
+                updated = cursor.fetchone()
+                updated_role = updated[0] if updated else None
+                if updated_role == new_role:
+                    print(f"[OK] Rol de '{user_id}' actualizado exitosamente a '{new_role}'")
+                else:
+                    print(f"[ERROR] El rol de '{user_id}' no se actualizo correctamente. Rol actual: {updated_role}")
+                    success = False
+            
+            return success
             
     except sqlite3.Error as e:
         print(f"[ERROR] Error de base de datos: {e}")
-        if conn:
-            conn.rollback()
-            conn.close()
         return False
     except Exception as e:
         print(f"[ERROR] Error inesperado: {e}")
-        if conn:
-            conn.close()
         return False
 
 